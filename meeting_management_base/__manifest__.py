@@ -5,11 +5,14 @@
     "author": "DIGIWAVES - ALGERIA",
     "website": "https://digiwaves.io/",
     "category": "Management/Meetings",
-    "depends": ['hr', 'contacts', 'calendar'],
+    "depends": ['hr', 'contacts', 'calendar', 'bus'],
     "data": [
         # data
         "data/dw_meeting_type_data.xml",
         "data/dw_participant_role_data.xml",
+        "data/dw_meeting_reminder_data.xml",
+        "data/dw_calendar_sync_data.xml",
+        "data/dw_meeting_summary_data.xml",
         # views
         "views/dw_actions_views.xml",
         "views/dw_equipment_type_views.xml",
@@ -26,6 +29,9 @@
         "views/dw_meeting_session_view.xml",
         "views/res_config_settings_view.xml",
         "views/dw_meeting_summary.xml",
+        "views/dw_meeting_event_views.xml",
+        "views/dw_meeting_attendance_report_views.xml",
+        "views/res_users_views.xml",
         # security
         "security/ir.model.access.csv",
         "security/dw_meeting_rules.xml",
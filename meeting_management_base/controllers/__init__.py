@@ -1,3 +1,4 @@
 from . import invitations
 from . import jitsi_jaas_controller
 from . import ai_summary
+from . import ics_feed
@@ -0,0 +1,157 @@
+from smartdz import http, fields
+from smartdz.http import request
+from datetime import timedelta
+from werkzeug.http import http_date
+import hashlib
+import hmac
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Meetings older than this are left out of the feeds
+ICS_PAST_DAYS = 30
+# Rows fetched per query while the feed is being streamed
+ICS_BATCH_SIZE = 500
+ICS_FIELDS = ['name', 'objet', 'planned_start_datetime', 'planned_end_time', 'room_id', 'location_id',
+              'state', 'write_date']
+
+
+def _ics_escape(value):
+    """Escape a TEXT value (RFC 5545 section 3.3.11)"""
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_line(line):
+    """Fold a content line to 75 octets (RFC 5545 section 3.1)"""
+    data = line.encode()
+    chunks = []
+    while len(data) > 75:
+        cut = 75 if not chunks else 74
+        # never split a UTF-8 sequence
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(data[:cut])
+        data = data[cut:]
+    chunks.append(data)
+    return b'\r\n '.join(chunks) + b'\r\n'
+
+
+def _ics_datetime(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+class MeetingIcsFeedController(http.Controller):
+
+    @http.route('/meeting/ics/user/<string:token>', type='http', auth='public', methods=['GET'], csrf=False)
+    def meeting_ics_user(self, token, **kwargs):
+        """iCalendar feed of the planifications the user takes part in"""
+        user = request.env['res.users'].sudo().search([('meeting_ics_token', '=', token)], limit=1) if token else None
+        if not user:
+            return request.not_found()
+        domain = [('participant_ids.user_id', '=', user.id)]
+        return self._ics_response(domain, f"user-{user.id}", f"Meetings - {user.name}")
+
+    @http.route('/meeting/ics/room/<int:room_id>', type='http', auth='public', methods=['GET'], csrf=False)
+    def meeting_ics_room(self, room_id, token=None, **kwargs):
+        """iCalendar feed of the planifications booked in the room"""
+        room = request.env['dw.room'].sudo().browse(room_id).exists()
+        if not room or not room.ics_token or not token or not hmac.compare_digest(room.ics_token, token):
+            return request.not_found()
+        domain = [('room_id', '=', room.id)]
+        return self._ics_response(domain, f"room-{room.id}", f"Room - {room.name}")
+
+    def _ics_response(self, domain, feed_key, calendar_name):
+        """
+        Answer a conditional GET from one aggregate query, or stream the feed.
+
+        The validators come from the newest ``write_date`` of the matching planifications
+        and of the rooms and locations they reference, and the number of planifications,
+        so edits, additions, removals and renamed rooms or locations all change the ETag.
+        """
+        Planification = request.env['dw.planification.meeting'].sudo()
+        domain = domain + [
+            ('state', '!=', 'draft'),
+            ('planned_start_datetime', '>=', fields.Datetime.now() - timedelta(days=ICS_PAST_DAYS)),
+        ]
+        [(last_write, count)] = Planification._read_group(domain, aggregates=['write_date:max', '__count'])
+        # a feed references few rooms and locations: one grouped query, their write_date in one read
+        places = Planification._read_group(domain, ['room_id', 'location_id'])
+        rooms = request.env['dw.room'].sudo().union(*(room for room, _location in places))
+        locations = request.env['dw.location'].sudo().union(*(location for _room, location in places))
+        last_write = max(filter(None, [last_write, *rooms.mapped('write_date'), *locations.mapped('write_date')]),
+                         default=None)
+        etag = hashlib.sha1(f"{feed_key}-{last_write}-{count}".encode()).hexdigest()
+        headers = [
+            ('ETag', f'"{etag}"'),
+            ('Cache-Control', 'private, no-cache'),
+        ]
+        if last_write:
+            headers.append(('Last-Modified', http_date(last_write.replace(microsecond=0))))
+
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            if httprequest.if_none_match.contains(etag):
+                return request.make_response('', status=304, headers=headers)
+        elif last_write and httprequest.if_modified_since \
+                and last_write.replace(microsecond=0) <= httprequest.if_modified_since.replace(tzinfo=None):
+            return request.make_response('', status=304, headers=headers)
+
+        # read everything while the cursor is open, the body is generated once the request returns
+        ids = Planification.search(domain, order='planned_start_datetime').ids
+        batches = [
+            Planification.browse(ids[i:i + ICS_BATCH_SIZE]).read(ICS_FIELDS, load=None)
+            for i in range(0, len(ids), ICS_BATCH_SIZE)
+        ]
+        rows = [meeting for batch in batches for meeting in batch]
+        room_names = {
+            room.id: room.name
+            for room in request.env['dw.room'].sudo().browse({m['room_id'] for m in rows if m['room_id']})
+        }
+        location_names = {
+            location.id: location.name
+            for location in request.env['dw.location'].sudo().browse(
+                {m['location_id'] for m in rows if m['location_id']})
+        }
+        host = httprequest.host.split(':')[0]
+
+        headers += [
+            ('Content-Type', 'text/calendar; charset=utf-8'),
+            ('Content-Disposition', f'inline; filename="{feed_key}.ics"'),
+        ]
+        return request.make_response(
+            self._ics_stream(batches, calendar_name, host, room_names, location_names), headers=headers)
+
+    def _ics_stream(self, batches, calendar_name, host, room_names, location_names):
+        yield b''.join([
+            _ics_line('BEGIN:VCALENDAR'),
+            _ics_line('VERSION:2.0'),
+            _ics_line('PRODID:-//DIGIWAVES//Meeting Management//EN'),
+            _ics_line('CALSCALE:GREGORIAN'),
+            _ics_line('METHOD:PUBLISH'),
+            _ics_line(f'X-WR-CALNAME:{_ics_escape(calendar_name)}'),
+        ])
+        for batch in batches:
+            chunk = []
+            for meeting in batch:
+                where = ', '.join(filter(None, [
+                    room_names.get(meeting['room_id']), location_names.get(meeting['location_id']),
+                ]))
+                end = meeting['planned_end_time'] or meeting['planned_start_datetime']
+                lines = [
+                    'BEGIN:VEVENT',
+                    f"UID:dw-planification-{meeting['id']}@{host}",
+                    f"DTSTAMP:{_ics_datetime(meeting['write_date'])}",
+                    f"LAST-MODIFIED:{_ics_datetime(meeting['write_date'])}",
+                    f"DTSTART:{_ics_datetime(meeting['planned_start_datetime'])}",
+                    f"DTEND:{_ics_datetime(end)}",
+                    f"SUMMARY:{_ics_escape(meeting['name'])}",
+                    'STATUS:CANCELLED' if meeting['state'] == 'cancelled' else 'STATUS:CONFIRMED',
+                ]
+                if meeting['objet']:
+                    lines.append(f"DESCRIPTION:{_ics_escape(meeting['objet'])}")
+                if where:
+                    lines.append(f"LOCATION:{_ics_escape(where)}")
+                lines.append('END:VEVENT')
+                chunk.extend(_ics_line(line) for line in lines)
+            yield b''.join(chunk)
+        yield _ics_line('END:VCALENDAR')
@@ -1,12 +1,118 @@
 from smartdz import http
 from smartdz.http import request
+from ..models.dw_participant import verify_rsvp_token
 import logging
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Per-IP limit on the public response links, kept in the memory of each worker
+RSVP_RATE_LIMIT = 20
+RSVP_RATE_WINDOW = 60
+_rsvp_hits = {}
+_rsvp_hits_lock = threading.Lock()
+
+
+def _rsvp_rate_limited(ip):
+    """Sliding-window limiter: True when ``ip`` exceeded RSVP_RATE_LIMIT hits in RSVP_RATE_WINDOW seconds"""
+    now = time.monotonic()
+    with _rsvp_hits_lock:
+        if len(_rsvp_hits) > 10000:
+            for key in [key for key, hits in _rsvp_hits.items() if now - hits[-1] > RSVP_RATE_WINDOW]:
+                del _rsvp_hits[key]
+        hits = [hit for hit in _rsvp_hits.get(ip, ()) if now - hit < RSVP_RATE_WINDOW]
+        limited = len(hits) >= RSVP_RATE_LIMIT
+        if not limited:
+            hits.append(now)
+        _rsvp_hits[ip] = hits
+    return limited
+
 
 class MeetingResponseController(http.Controller):
 
+    @http.route('/meeting/rsvp/<string:token>/<string:response>',
+                type='http',
+                auth='public',
+                methods=['GET'],
+                website=True,
+                csrf=False)
+    def meeting_response_signed(self, token, response, **kwargs):
+        """
+        Stateless invitation response handler.
+
+        The token carries the participant, the meeting and an expiry signed with
+        the database secret: rate-limited, forged and expired requests are answered
+        before any query, and a valid answer is recorded with one conditional UPDATE.
+
+        Args:
+            token: signed token from dw.participant._get_rsvp_token
+            response: 'accept' or 'decline'
+        """
+        if _rsvp_rate_limited(request.httprequest.remote_addr):
+            return request.make_response('Too many requests, please retry later.', status=429,
+                                         headers=[('Retry-After', str(RSVP_RATE_WINDOW))])
+        if response not in ['accept', 'decline']:
+            return request.make_response('Invalid response type.', status=400)
+
+        secret = request.env['ir.config_parameter'].sudo().get_param('database.secret')
+        verified = verify_rsvp_token(secret, token)
+        if not verified:
+            return request.make_response('Invalid or expired link.', status=403)
+        participant_id, meeting_id = verified
+
+        try:
+            new_status = 'accepted' if response == 'accept' else 'declined'
+            request.env.cr.execute("""
+                UPDATE dw_participant
+                   SET invitation_status = %s,
+                       write_date = (now() at time zone 'UTC')
+                 WHERE id = %s
+                   AND meeting_planification_id = %s
+                   AND invitation_status = 'pending'
+             RETURNING id
+            """, [new_status, participant_id, meeting_id])
+            updated = bool(request.env.cr.fetchone())
+
+            Participant = request.env['dw.participant'].sudo()
+            participant = Participant.browse(participant_id)
+            participant.invalidate_recordset(['invitation_status'])
+            meeting = participant.meeting_planification_id
+
+            if updated:
+                request.env['dw.planification.meeting'].sudo()._apply_rsvp_deltas(
+                    {meeting_id: {'pending': -1, new_status: 1}})
+            else:
+                if not participant.exists():
+                    return request.render('meeting_management_base.meeting_response_error', {
+                        'message': 'Participant not found.'
+                    })
+                return request.render('meeting_management_base.meeting_response_already', {
+                    'meeting': meeting,
+                    'participant': participant,
+                    'previous_status': participant.invitation_status
+                })
+
+            meeting.message_post(
+                body=f"Participant {participant.name} has {new_status} the meeting invitation.",
+                message_type='notification',
+                subtype_xmlid='mail.mt_note'
+            )
+            _logger.info(f"Meeting {meeting_id} - Participant {participant.name} {new_status} invitation")
+
+            return request.render('meeting_management_base.meeting_response_success', {
+                'meeting': meeting,
+                'participant': participant,
+                'response': response,
+                'status': new_status
+            })
+
+        except Exception as e:
+            _logger.error(f"Error processing meeting response: {str(e)}", exc_info=True)
+            return request.render('meeting_management_base.meeting_response_error', {
+                'message': 'An error occurred while processing your response.'
+            })
+
     @http.route('/meeting/respond/<int:meeting_id>/<int:participant_id>/<string:token>/<string:response>',
                 type='http',
                 auth='public',
@@ -23,6 +129,13 @@ class MeetingResponseController(http.Controller):
             token: Access token for authentication
             response: 'accept' or 'decline'
         """
+        if _rsvp_rate_limited(request.httprequest.remote_addr):
+            return request.make_response('Too many requests, please retry later.', status=429,
+                                         headers=[('Retry-After', str(RSVP_RATE_WINDOW))])
+        # tokens are 64 hex digits: drop malformed ones before reading the participant
+        if len(token) != 64 or any(char not in '0123456789abcdef' for char in token):
+            return request.make_response('Invalid or expired link.', status=403)
+
         try:
             # Validate inputs
             if response not in ['accept', 'decline']:
@@ -13,4 +13,14 @@ from . import (dw_planification_meeting,
                dw_reservations,
                res_config_settings,
                dw_meeting_summary,
+               ir_websocket,
+               dw_meeting_event,
+               dw_meeting_attendance_report,
+               mail_mail,
+               res_users,
+               dw_meeting_reminder,
+               dw_meeting_summary_ai,
+               dw_meeting_summary_job,
+               dw_meeting_summary_cache,
+               dw_meeting_summary_recipient,
                )
@@ -1,5 +1,6 @@
-from smartdz import models, fields, api
+from smartdz import models, fields, api, _
 from smartdz.exceptions import ValidationError
+import json
 
 
 class DwActions(models.Model):
@@ -34,17 +35,111 @@ class DwActions(models.Model):
     # Add completion tracking
     completed_date = fields.Datetime(string='Completed Date', readonly=True)
 
-    @api.model
-    def create(self, vals):
+    # Fields the session view is allowed to set through sync_actions
+    _SYNC_FIELDS = ('name', 'assignee', 'dead_line', 'priority', 'status', 'description')
+
+    @api.model_create_multi
+    def create(self, vals_list):
         """Auto-link to meeting if session is provided"""
-        if vals.get('session_id') and not vals.get('meeting_id'):
-            session = self.env['dw.meeting.session'].browse(vals['session_id'])
-            if session.meeting_id:
-                vals['meeting_id'] = session.meeting_id.id
-        return super().create(vals)
+        session_ids = {
+            vals['session_id'] for vals in vals_list
+            if vals.get('session_id') and not vals.get('meeting_id')
+        }
+        if session_ids:
+            sessions = self.env['dw.meeting.session'].browse(session_ids)
+            meeting_by_session = {session.id: session.meeting_id.id for session in sessions}
+            for vals in vals_list:
+                if vals.get('session_id') and not vals.get('meeting_id') and meeting_by_session.get(vals['session_id']):
+                    vals['meeting_id'] = meeting_by_session[vals['session_id']]
+        return super().create(vals_list)
 
     def write(self, vals):
         """Track completion date"""
-        if vals.get('status') == 'done' and self.status != 'done':
-            vals['completed_date'] = fields.Datetime.now()
-        return super().write(vals)
\ No newline at end of file
+        if vals.get('status') == 'done' and 'completed_date' not in vals:
+            to_complete = self.filtered(lambda action: action.status != 'done')
+            if to_complete:
+                super(DwActions, to_complete).write(dict(vals, completed_date=fields.Datetime.now()))
+                return super(DwActions, self - to_complete).write(vals)
+        return super().write(vals)
+
+    @api.model
+    def sync_actions(self, session_id, ops):
+        """Apply a batch of action item edits coming from the session view.
+
+        ``ops`` is a list of ``{'op': 'create', 'ref': str, 'values': dict}``,
+        ``{'op': 'update', 'id': int | 'ref': str, 'values': dict}`` and
+        ``{'op': 'delete', 'id': int | 'ref': str}``. Operations are coalesced per
+        record before being applied, so each action is created, written or unlinked
+        at most once and mail tracking produces a single message per record.
+
+        Returns ``{'created': {ref: id}, 'updated': [ids], 'deleted': [ids]}``.
+        """
+        session = self.env['dw.meeting.session'].browse(session_id).exists()
+        if not session:
+            raise ValidationError(_("Meeting session not found."))
+        session.check_access('write')
+
+        def clean(values):
+            return {key: value for key, value in (values or {}).items() if key in self._SYNC_FIELDS}
+
+        creates = {}
+        updates = {}
+        deletes = set()
+        for op in ops:
+            kind = op.get('op')
+            ref = op.get('ref')
+            record_id = op.get('id')
+            if kind == 'create' and ref:
+                creates[ref] = clean(op.get('values'))
+            elif kind == 'update':
+                if ref in creates:
+                    creates[ref].update(clean(op.get('values')))
+                elif record_id and record_id not in deletes:
+                    updates.setdefault(record_id, {}).update(clean(op.get('values')))
+            elif kind == 'delete':
+                if ref in creates:
+                    del creates[ref]
+                elif record_id:
+                    updates.pop(record_id, None)
+                    deletes.add(record_id)
+
+        # only the actions of this session can be touched from the session view
+        existing = self.search([('id', 'in', list(deletes | set(updates))), ('session_id', '=', session.id)])
+        existing_ids = set(existing.ids)
+
+        to_delete = existing.filtered(lambda action: action.id in deletes)
+        deleted_ids = to_delete.ids
+        to_delete.unlink()
+
+        # group identical writes to share one UPDATE
+        writes = {}
+        for record_id, values in updates.items():
+            if record_id in existing_ids and values:
+                # JSON keeps the type: 1 and '1', False and 'False' do not share a write
+                key = tuple(sorted((field, json.dumps(value, sort_keys=True, default=str))
+                                   for field, value in values.items()))
+                writes.setdefault(key, (values, []))[1].append(record_id)
+        for values, record_ids in writes.values():
+            self.browse(record_ids).write(values)
+
+        updated_ids = [record_id for values, record_ids in writes.values() for record_id in record_ids]
+
+        refs = list(creates)
+        created = self.with_context(mail_create_nolog=True).create([
+            dict({'name': _('New Action')}, **creates[ref], session_id=session.id, meeting_id=session.meeting_id.id)
+            for ref in refs
+        ])
+
+        if created or writes or deleted_ids:
+            self.env['dw.meeting.event']._log('action', [(session.meeting_id.id, {
+                'session_id': session.id,
+                'created': created.ids,
+                'updated': updated_ids,
+                'deleted': deleted_ids,
+            })])
+
+        return {
+            'created': dict(zip(refs, created.ids)),
+            'updated': updated_ids,
+            'deleted': deleted_ids,
+        }
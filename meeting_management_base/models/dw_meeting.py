@@ -1,7 +1,49 @@
 import uuid
+import logging
 from smartdz import models, fields, api, _
 from datetime import datetime, timedelta
-from smartdz.exceptions import ValidationError
+from smartdz.exceptions import AccessError, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# Number of PV steps kept in the journal before the text is folded back into dw.meeting.pv
+PV_SNAPSHOT_INTERVAL = 20
+
+
+def _pv_apply_op(text, op):
+    """Apply a replace operation ``{'pos', 'del', 'ins'}`` to ``text``."""
+    pos = min(max(int(op.get('pos', 0)), 0), len(text))
+    return text[:pos] + (op.get('ins') or '') + text[pos + max(int(op.get('del', 0)), 0):]
+
+
+def _pv_transform_op(op, applied):
+    """Rebase ``op`` on top of ``applied``, both being replace operations on the same text.
+
+    Concurrent inserts at the same offset are ordered after the already applied one;
+    overlapping deletions are merged, the later edit winning on the shared range.
+    """
+    a_pos = int(applied.get('pos', 0))
+    a_del = int(applied.get('del', 0))
+    a_ins = len(applied.get('ins') or '')
+
+    def map_start(x):
+        if x < a_pos:
+            return x
+        if x >= a_pos + a_del:
+            return x + a_ins - a_del
+        return a_pos + a_ins
+
+    def map_end(x):
+        if x <= a_pos:
+            return x
+        if x >= a_pos + a_del:
+            return x + a_ins - a_del
+        return a_pos
+
+    pos = int(op.get('pos', 0))
+    start = map_start(pos)
+    end = map_end(pos + int(op.get('del', 0)))
+    return {'pos': start, 'del': max(0, end - start), 'ins': op.get('ins') or ''}
 
 
 class DwMeeting(models.Model):
@@ -38,6 +80,9 @@ class DwMeeting(models.Model):
     note_ids = fields.One2many('dw.meeting.note', 'meeting_id', string='Notes')
     decision_ids = fields.One2many('dw.meeting.decision', 'meeting_id', string='Decisions')
     pv = fields.Text(string='PV')
+    pv_revision = fields.Integer(string='PV Revision', default=0, copy=False)
+    pv_snapshot_revision = fields.Integer(string='PV Snapshot Revision', default=0, copy=False)
+    pv_step_ids = fields.One2many('dw.meeting.pv.step', 'meeting_id', string='PV Steps')
 
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -65,6 +110,118 @@ class DwMeeting(models.Model):
             host = meeting.participant_ids.filtered(lambda p: p.role_id.name == 'host')
             meeting.host_participant_id = host[0] if host else False
 
+    def write(self, vals):
+        """A direct write on the PV replaces the live document: reset the step journal"""
+        if 'pv' not in vals or self.env.context.get('pv_snapshot'):
+            return super().write(vals)
+
+        result = True
+        for meeting in self:
+            revision = meeting.pv_revision + 1
+            result &= super(DwMeeting, meeting).write(dict(vals, pv_revision=revision, pv_snapshot_revision=revision))
+            meeting._pv_broadcast({'revision': revision, 'text': vals['pv'] or ''})
+        return result
+
+    # live PV editing
+    def _pv_broadcast(self, payload):
+        """Send a PV update to every participant following the meeting channel"""
+        self.ensure_one()
+        self.env['bus.bus']._sendone((self, 'pv'), 'dw_meeting_pv/step', dict(payload, meeting_id=self.id))
+
+    def _check_pv_writer(self):
+        self.ensure_one()
+        is_writer = self.env['dw.meeting.session'].search_count([
+            ('meeting_id', '=', self.id),
+            ('user_id', '=', self.env.uid),
+            ('is_pv', '=', True),
+        ], limit=1)
+        if not is_writer:
+            raise AccessError(_("Only the PV writer of this meeting can edit the minutes."))
+
+    def pv_get_state(self):
+        """Return the live PV text: the last snapshot with the pending steps replayed"""
+        self.ensure_one()
+        steps = self.env['dw.meeting.pv.step'].search_read([
+            ('meeting_id', '=', self.id),
+            ('revision', '>', self.pv_snapshot_revision),
+        ], ['op'], order='revision asc')
+
+        text = self.pv or ''
+        for step in steps:
+            text = _pv_apply_op(text, step['op'])
+        return {'text': text, 'revision': self.pv_revision}
+
+    def pv_push_step(self, base_revision, op, client_id=False):
+        """Apply one edit made by the PV writer on top of ``base_revision`` and broadcast it.
+
+        The edit is rebased on every step accepted since ``base_revision`` so that two
+        tabs of the writer converge. Returns ``{'resync': True}`` when the steps needed
+        to rebase have already been folded into a snapshot.
+        """
+        self.ensure_one()
+        self._check_pv_writer()
+
+        # serialise concurrent pushes on the meeting row
+        self.env.cr.execute("SELECT pv_revision FROM dw_meeting WHERE id = %s FOR UPDATE", [self.id])
+        self.invalidate_recordset(['pv', 'pv_revision', 'pv_snapshot_revision'])
+
+        base_revision = int(base_revision)
+        if base_revision > self.pv_revision:
+            return {'resync': True}
+
+        concurrent = self.env['dw.meeting.pv.step'].search_read([
+            ('meeting_id', '=', self.id),
+            ('revision', '>', base_revision),
+        ], ['op'], order='revision asc')
+        if len(concurrent) != self.pv_revision - base_revision:
+            return {'resync': True}
+
+        op = {'pos': int(op.get('pos', 0)), 'del': int(op.get('del', 0)), 'ins': op.get('ins') or ''}
+        for step in concurrent:
+            op = _pv_transform_op(op, step['op'])
+
+        revision = self.pv_revision + 1
+        # users only read the steps, they are written here once the writer is checked
+        self.env['dw.meeting.pv.step'].sudo().create({
+            'meeting_id': self.id,
+            'revision': revision,
+            'op': op,
+            'client_id': client_id or False,
+        })
+        self.write({'pv_revision': revision})
+
+        if revision - self.pv_snapshot_revision >= PV_SNAPSHOT_INTERVAL:
+            self._pv_snapshot()
+
+        self._pv_broadcast({'revision': revision, 'op': op, 'client_id': client_id or False})
+        return {'revision': revision, 'op': op}
+
+    def pv_save_snapshot(self):
+        """Fold the pending steps into the PV field (explicit save from the writer)"""
+        self.ensure_one()
+        self._check_pv_writer()
+        self.env.cr.execute("SELECT pv_revision FROM dw_meeting WHERE id = %s FOR UPDATE", [self.id])
+        self.invalidate_recordset(['pv', 'pv_revision', 'pv_snapshot_revision'])
+        self._pv_snapshot()
+        return {'revision': self.pv_revision}
+
+    def _pv_snapshot(self):
+        self.ensure_one()
+        if self.pv_snapshot_revision == self.pv_revision:
+            return
+        previous_snapshot = self.pv_snapshot_revision
+        state = self.pv_get_state()
+        self.with_context(pv_snapshot=True).write({
+            'pv': state['text'],
+            'pv_snapshot_revision': state['revision'],
+        })
+        self.env['dw.meeting.event']._log('pv', [(self.id, {'revision': state['revision']})])
+        # keep one interval of history so lagging clients can still be rebased
+        self.env['dw.meeting.pv.step'].sudo().search([
+            ('meeting_id', '=', self.id),
+            ('revision', '<=', previous_snapshot),
+        ]).unlink()
+
     def open_meeting(self):
         self.ensure_one()
         Planification = self.env['dw.planification.meeting']
@@ -214,6 +371,23 @@ class DwMeetingNote(models.Model):
     is_action_item = fields.Boolean(string='Action Item')
 
 
+class DwMeetingPvStep(models.Model):
+    """PV Steps - journal of live edits not yet folded into the PV snapshot"""
+    _name = 'dw.meeting.pv.step'
+    _description = 'Meeting PV Step'
+    _order = 'meeting_id, revision'
+
+    meeting_id = fields.Many2one('dw.meeting', string='Meeting', required=True, ondelete='cascade', index=True)
+    revision = fields.Integer(string='Revision', required=True)
+    op = fields.Json(string='Operation', required=True)
+    client_id = fields.Char(string='Client')
+    author_id = fields.Many2one('res.users', string='Author', default=lambda self: self.env.user)
+
+    _sql_constraints = [
+        ('meeting_revision_uniq', 'unique(meeting_id, revision)', 'A PV revision can only be recorded once.'),
+    ]
+
+
 class DwMeetingDecision(models.Model):
     """Meeting Decisions - track key decisions made"""
     _name = 'dw.meeting.decision'
@@ -231,6 +405,15 @@ class DwMeetingDecision(models.Model):
         ('high', 'High'),
     ], string='Impact', default='medium')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        decisions = super().create(vals_list)
+        self.env['dw.meeting.event']._log('decision', [
+            (decision.meeting_id.id, {'decision_id': decision.id, 'title': decision.title})
+            for decision in decisions
+        ])
+        return decisions
+
 
 
 
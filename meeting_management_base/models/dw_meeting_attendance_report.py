@@ -0,0 +1,98 @@
+from smartdz import models, fields, tools
+
+# Minutes of tolerance before a join counts as late or a leave as early
+ATTENDANCE_GRACE_MINUTES = 5
+
+
+class DwMeetingAttendanceReport(models.Model):
+    """Attendance Analysis - one row per participant of a held meeting"""
+    _name = 'dw.meeting.attendance.report'
+    _description = 'Meeting Attendance Analysis'
+    _auto = False
+    _order = 'planned_start_datetime desc'
+
+    meeting_id = fields.Many2one('dw.meeting', string='Meeting', readonly=True)
+    participant_id = fields.Many2one('dw.participant', string='Participant', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    employee_id = fields.Many2one('hr.employee', string='Employee', readonly=True)
+    department_id = fields.Many2one('hr.department', string='Department', readonly=True)
+    meeting_type_id = fields.Many2one('dw.meeting.type', string='Meeting Type', readonly=True)
+    planned_start_datetime = fields.Datetime(string='Planned Start', readonly=True)
+    join_datetime = fields.Datetime(string='Join Time', readonly=True)
+    leave_datetime = fields.Datetime(string='Leave Time', readonly=True)
+    invitation_status = fields.Selection([
+        ('pending', 'Pending'),
+        ('accepted', 'Accepted'),
+        ('declined', 'Declined')
+    ], string='Invitation Status', readonly=True)
+
+    invited_count = fields.Integer(string='Invited', readonly=True)
+    accepted_count = fields.Integer(string='Accepted', readonly=True)
+    attended_count = fields.Integer(string='Attended', readonly=True)
+    late_count = fields.Integer(string='Late Arrivals', readonly=True)
+    early_leave_count = fields.Integer(string='Early Leaves', readonly=True)
+    no_show_count = fields.Integer(string='No-shows', readonly=True)
+    minutes_attended = fields.Float(string='Minutes Attended', readonly=True)
+    minutes_late = fields.Float(string='Minutes Late', readonly=True)
+    attendance_rate = fields.Float(string='Attendance Rate (%)', readonly=True, aggregator='avg')
+    punctuality_rate = fields.Float(string='Punctuality Rate (%)', readonly=True, aggregator='avg')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                WITH base AS (
+                    SELECT p.id AS id,
+                           m.id AS meeting_id,
+                           p.id AS participant_id,
+                           p.user_id AS user_id,
+                           p.employee_id AS employee_id,
+                           COALESCE(p.department, e.department_id) AS department_id,
+                           m.meeting_type_id AS meeting_type_id,
+                           m.planned_start_datetime AS planned_start_datetime,
+                           p.invitation_status AS invitation_status,
+                           COALESCE(m.actual_start_datetime, m.planned_start_datetime) AS start_ref,
+                           COALESCE(m.actual_end_datetime, m.planned_end_time) AS end_ref,
+                           s.join_datetime AS join_datetime,
+                           s.leave_datetime AS leave_datetime
+                      FROM dw_participant p
+                      JOIN dw_meeting m ON m.id = p.meeting_id
+                 LEFT JOIN hr_employee e ON e.id = p.employee_id
+                 LEFT JOIN LATERAL (
+                        SELECT MIN(ses.join_datetime) AS join_datetime,
+                               MAX(COALESCE(ses.leave_datetime, ses.actual_end_datetime)) AS leave_datetime
+                          FROM dw_meeting_session ses
+                         WHERE ses.participant_id = p.id
+                           AND ses.meeting_id = m.id
+                    ) s ON TRUE
+                     WHERE m.state IN ('in_progress', 'done')
+                )
+                SELECT id,
+                       meeting_id,
+                       participant_id,
+                       user_id,
+                       employee_id,
+                       department_id,
+                       meeting_type_id,
+                       planned_start_datetime,
+                       invitation_status,
+                       join_datetime,
+                       leave_datetime,
+                       1 AS invited_count,
+                       (invitation_status = 'accepted')::int AS accepted_count,
+                       (join_datetime IS NOT NULL)::int AS attended_count,
+                       (join_datetime > start_ref + interval '%s minutes')::int AS late_count,
+                       (leave_datetime < end_ref - interval '%s minutes')::int AS early_leave_count,
+                       (invitation_status = 'accepted' AND join_datetime IS NULL)::int AS no_show_count,
+                       COALESCE(GREATEST(0, EXTRACT(EPOCH FROM (
+                           LEAST(COALESCE(leave_datetime, end_ref), COALESCE(end_ref, leave_datetime))
+                           - GREATEST(join_datetime, start_ref)
+                       )) / 60), 0) AS minutes_attended,
+                       COALESCE(GREATEST(0, EXTRACT(EPOCH FROM (join_datetime - start_ref)) / 60), 0) AS minutes_late,
+                       CASE WHEN join_datetime IS NOT NULL THEN 100.0 ELSE 0.0 END AS attendance_rate,
+                       CASE WHEN join_datetime IS NULL THEN NULL
+                            WHEN join_datetime > start_ref + interval '%s minutes' THEN 0.0
+                            ELSE 100.0 END AS punctuality_rate
+                  FROM base
+            )
+        """ % (self._table, ATTENDANCE_GRACE_MINUTES, ATTENDANCE_GRACE_MINUTES, ATTENDANCE_GRACE_MINUTES))
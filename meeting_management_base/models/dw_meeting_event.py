@@ -0,0 +1,127 @@
+from smartdz import models, fields, api, tools, _
+from smartdz.exceptions import UserError
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Rows deleted per statement by the retention job
+EVENT_GC_BATCH = 10000
+# Event types the session view may log; the others are only written by the server through _log
+CLIENT_EVENT_TYPES = ('join', 'leave', 'camera')
+
+
+class DwMeetingEvent(models.Model):
+    """Meeting Events - append-only journal of what happened during a meeting"""
+    _name = 'dw.meeting.event'
+    _description = 'Meeting Event'
+    _order = 'meeting_id, timestamp, id'
+    _log_access = False
+
+    meeting_id = fields.Many2one('dw.meeting', string='Meeting', required=True, ondelete='cascade')
+    session_id = fields.Many2one('dw.meeting.session', string='Session', ondelete='set null')
+    user_id = fields.Many2one('res.users', string='User', default=lambda self: self.env.user)
+    event_type = fields.Selection([
+        ('join', 'Joined'),
+        ('leave', 'Left'),
+        ('agenda', 'Agenda Change'),
+        ('decision', 'Decision'),
+        ('action', 'Action Items'),
+        ('camera', 'Camera Toggle'),
+        ('pv', 'PV Saved'),
+    ], string='Type', required=True)
+    timestamp = fields.Datetime(string='Timestamp', required=True, default=fields.Datetime.now, index=True)
+    payload = fields.Json(string='Payload')
+
+    def init(self):
+        # timeline replay and per-meeting analytics are range scans on this index
+        tools.create_index(self._cr, 'dw_meeting_event_meeting_timestamp_index',
+                           self._table, ['meeting_id', 'timestamp'])
+
+    def write(self, vals):
+        raise UserError(_("Meeting events are append-only and cannot be modified."))
+
+    def unlink(self):
+        # the retention job deletes in SQL, there is no way around this one
+        raise UserError(_("Meeting events are append-only and cannot be deleted."))
+
+    @api.model
+    def log_events(self, meeting_id, events):
+        """Append a batch of client events for a meeting the user takes part in.
+
+        ``events`` is a list of ``{'type', 'session_id', 'payload'}`` dicts. Only the
+        CLIENT_EVENT_TYPES are accepted, the events are stamped with the server time and
+        their session must be one of the user's sessions of that meeting. Users cannot
+        create events themselves, they go through here.
+        """
+        meeting = self.env['dw.meeting'].browse(meeting_id)
+        meeting.check_access('read')
+
+        session_ids = {event.get('session_id') for event in events if event.get('session_id')}
+        own_sessions = set(self.env['dw.meeting.session'].search([
+            ('id', 'in', list(session_ids)), ('meeting_id', '=', meeting.id), ('user_id', '=', self.env.uid),
+        ]).ids) if session_ids else set()
+        if session_ids - own_sessions:
+            raise UserError(_("These events do not belong to one of your sessions of this meeting."))
+
+        now = fields.Datetime.now()
+        vals_list = [{
+            'meeting_id': meeting.id,
+            'session_id': event.get('session_id') or False,
+            'user_id': self.env.uid,
+            'event_type': event['type'],
+            'timestamp': now,
+            'payload': event.get('payload') or False,
+        } for event in events if event.get('type') in CLIENT_EVENT_TYPES]
+        return len(self.sudo().create(vals_list))
+
+    @api.model
+    def _log(self, event_type, entries):
+        """Append server-side events from an iterable of ``(meeting_id, payload)``"""
+        return self.sudo().create([{
+            'meeting_id': meeting_id,
+            'event_type': event_type,
+            'user_id': self.env.uid,
+            'payload': payload or False,
+        } for meeting_id, payload in entries if meeting_id])
+
+    @api.model
+    def get_timeline(self, meeting_id, start=None, end=None, event_types=None):
+        """Return the events of a meeting in chronological order, optionally within a time range"""
+        self.env['dw.meeting'].browse(meeting_id).check_access('read')
+        domain = [('meeting_id', '=', meeting_id)]
+        if start:
+            domain.append(('timestamp', '>=', start))
+        if end:
+            domain.append(('timestamp', '<', end))
+        if event_types:
+            domain.append(('event_type', 'in', event_types))
+        return self.search_read(domain, ['timestamp', 'event_type', 'user_id', 'session_id', 'payload'])
+
+    @api.autovacuum
+    def _gc_old_events(self):
+        """Drop the journal of meetings that ended longer ago than the retention period"""
+        retention_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'meeting_management_base.event_retention_days', 365))
+        if retention_days <= 0:
+            return
+        limit_date = fields.Datetime.now() - timedelta(days=retention_days)
+
+        removed = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM dw_meeting_event
+                 WHERE id IN (
+                    SELECT e.id
+                      FROM dw_meeting_event e
+                      JOIN dw_meeting m ON m.id = e.meeting_id
+                     WHERE m.state IN ('done', 'cancelled')
+                       AND e.timestamp < %s
+                     LIMIT %s
+                 )
+            """, [limit_date, EVENT_GC_BATCH])
+            removed += self.env.cr.rowcount
+            if self.env.cr.rowcount < EVENT_GC_BATCH:
+                break
+        self.invalidate_model()
+        _logger.info("GC'd %d meeting events older than %s", removed, limit_date)
@@ -0,0 +1,30 @@
+from smartdz import models, fields, api, _
+
+
+class DwMeetingReminderOffset(models.Model):
+    _name = 'dw.meeting.reminder.offset'
+    _description = 'Meeting Reminder Offset'
+    _order = 'minutes_before desc'
+
+    meeting_type_id = fields.Many2one('dw.meeting.type', string='Meeting Type', required=True, ondelete='cascade',
+                                      index=True)
+    minutes_before = fields.Integer(string='Minutes Before', required=True, default=15)
+    notify_by = fields.Selection([
+        ('email', 'Email'),
+        ('notification', 'Notification'),
+        ('both', 'Email and Notification'),
+    ], string='Notify By', required=True, default='both')
+
+    _sql_constraints = [
+        ('minutes_before_positive', 'CHECK(minutes_before > 0)', 'The reminder offset must be positive.'),
+        ('offset_unique', 'unique(meeting_type_id, minutes_before)',
+         'This reminder offset already exists for the meeting type.'),
+    ]
+
+    @api.depends('minutes_before')
+    def _compute_display_name(self):
+        for offset in self:
+            hours, minutes = divmod(offset.minutes_before, 60)
+            days, hours = divmod(hours, 24)
+            parts = [f"{days}d" if days else '', f"{hours}h" if hours else '', f"{minutes}min" if minutes else '']
+            offset.display_name = _("%s before", ' '.join(filter(None, parts)))
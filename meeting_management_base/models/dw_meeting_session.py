@@ -17,14 +17,14 @@ class DwMeetingSession(models.Model):
     planned_start_datetime = fields.Datetime(related="meeting_id.planned_start_datetime", readonly=True, store=True)
     planned_end_time = fields.Datetime(related="meeting_id.planned_end_time", readonly=True, store=True)
     duration = fields.Float(string="Duration (hours)", related="planification_id.duration", store=True)
-    meeting_id = fields.Many2one("dw.meeting", string="Meeting", required=True, ondelete="cascade")
+    meeting_id = fields.Many2one("dw.meeting", string="Meeting", required=True, ondelete="cascade", index=True)
 
     # from session
     actual_start_datetime = fields.Datetime(string='Actual Start Date & Time', tracking=True)
     actual_end_datetime = fields.Datetime(string='Actual End Date & Time', tracking=True)
     actual_duration = fields.Float(string='Duration (hours)', default=1.0, tracking=True)
     user_id = fields.Many2one("res.users", string="User", required=True)
-    participant_id = fields.Many2one("dw.participant", string="Linked Participant")
+    participant_id = fields.Many2one("dw.participant", string="Linked Participant", index=True)
     personal_actions_ids = fields.One2many("dw.actions", "session_id", string="Personal Actions")
     personal_notes = fields.Text(string="My Notes / MoM")
     requirements = fields.Html(string="My Requirements")
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 from smartdz import models, fields, api
 from smartdz.exceptions import ValidationError
+from smartdz.tools import email_normalize
 import json
+import logging
+
+_logger = logging.getLogger(__name__)
 
 
 class DwMeetingSummary(models.Model):
@@ -29,11 +33,21 @@ class DwMeetingSummary(models.Model):
     generated_by = fields.Many2one('res.users', string='Generated By', default=lambda self: self.env.user)
     generation_date = fields.Datetime(string='Generated On', default=fields.Datetime.now)
     ai_model_used = fields.Char(string='AI Model', default='Google Gemini')
+    input_hash = fields.Char(string='Input Hash', index=True, readonly=True, copy=False,
+                             help='Hash of the meeting data the AI prompts were planned from, with their token budget')
+    prompt_token_budget = fields.Integer(string='Prompt Token Budget', readonly=True, copy=False)
+    prompt_tokens_trimmed = fields.Integer(string='Tokens Trimmed', readonly=True, copy=False,
+                                           help='Estimated tokens of duplicate or low-priority content left out '
+                                                'of the prompt to fit the budget')
 
     # Raw data for AI processing
     raw_notes = fields.Text(string='Raw Notes Data')
     raw_actions = fields.Text(string='Raw Actions Data')
 
+    # Distribution
+    recipient_ids = fields.One2many('dw.meeting.summary.recipient', 'summary_id', string='Recipients',
+                                    readonly=True)
+
     # Status
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -59,6 +73,19 @@ class DwMeetingSummary(models.Model):
                 ('meeting_id', '=', record.meeting_id.id)
             ])
 
+    def action_regenerate(self):
+        """Generate the summary again, bypassing the cache"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'generate_meeting_summary',
+            'params': {
+                'meeting_id': self.meeting_id.id,
+                'meeting_name': self.meeting_id.name,
+                'force': True,
+            }
+        }
+
     def action_validate(self):
         """Validate the summary"""
         self.write({'state': 'validated'})
@@ -78,25 +105,13 @@ class DwMeetingSummary(models.Model):
         if not template:
             raise ValidationError("Email template not found!")
 
-        sent_count = 0
-        for participant in self.meeting_id.participant_ids:
-            email = None
-            if participant.partner_id and participant.partner_id.email:
-                email = participant.partner_id.email
-            elif participant.employee_id and participant.employee_id.work_email:
-                email = participant.employee_id.work_email
-
-            if email:
-                template.send_mail(self.id, force_send=True, email_values={
-                    'email_to': email
-                })
-                sent_count += 1
+        sent_count = len(self._queue_distribution(template))
 
         self.write({'state': 'sent'})
 
         # Post message to chatter
         self.message_post(
-            body=f"Summary sent to {sent_count} participant(s)",
+            body=f"Summary queued for {sent_count} recipient(s)",
             message_type='notification',
             subtype_xmlid='mail.mt_comment'
         )
@@ -106,70 +121,172 @@ class DwMeetingSummary(models.Model):
             'tag': 'display_notification',
             'params': {
                 'title': 'Success',
-                'message': f'Summary sent to {sent_count} participants',
+                'message': f'Summary queued for {sent_count} recipient(s)',
                 'type': 'success',
             }
         }
 
+    def _group_recipients(self):
+        """
+        Mailboxes reaching the participants of the meeting, one per person.
+
+        Participants sharing an address (partner email, employee work email or the email of
+        the employee's user) are merged, so someone registered both as a contact and as an
+        employee gets the summary once.
+
+        :return: list of {'participants', 'partner', 'email', 'lang'}
+        """
+        self.ensure_one()
+        participants = self.meeting_id.participant_ids
+        emails = participants._resolve_emails()
+        partners = participants._resolve_partners()
+        participants.employee_id.user_id.partner_id.fetch(['email', 'lang'])
+
+        groups, group_of = [], {}
+        for participant in participants.filtered(lambda p: emails[p.id]):
+            addresses = {
+                email_normalize(email) for email in (
+                    participant.partner_id.email,
+                    participant.employee_id.work_email,
+                    participant.employee_id.user_id.partner_id.email,
+                ) if email
+            } - {False}
+            found = []
+            for address in addresses:
+                group = group_of.get(address)
+                if group is not None and all(group is not other for other in found):
+                    found.append(group)
+            if found:
+                # this participant links groups that were distinct until now
+                group = found[0]
+                for other in found[1:]:
+                    group['participants'] |= other['participants']
+                    group['addresses'] |= other['addresses']
+                groups = [g for g in groups if all(g is not other for other in found[1:])]
+            else:
+                partner = partners[participant.id]
+                group = {
+                    'participants': participant.browse(),
+                    'addresses': set(),
+                    'partner': partner,
+                    'email': emails[participant.id],
+                    'lang': partner.lang or self.env.lang or 'en_US',
+                }
+                groups.append(group)
+            group['participants'] |= participant
+            group['addresses'] |= addresses
+            for address in group['addresses']:
+                group_of[address] = group
+        return groups
+
+    def _queue_distribution(self, template):
+        """
+        Render ``template`` once per recipient language and queue one email per mailbox.
+
+        The emails are delivered by the mail queue; their outcome is reported on the
+        ``recipient_ids`` replacing those of a previous sending.
+        """
+        self.ensure_one()
+        groups = self._group_recipients()
+        # the delivery report is only written by the server, users just read it
+        self.recipient_ids.sudo().unlink()
+        if not groups:
+            return self.env['dw.meeting.summary.recipient']
+
+        mails = self.env['mail.mail']._create_from_template(
+            template, [(self, group['email'], group['lang']) for group in groups])
+        recipients = self.env['dw.meeting.summary.recipient'].sudo().create([{
+            'summary_id': self.id,
+            'participant_ids': [(6, 0, group['participants'].ids)],
+            'partner_id': group['partner'].id,
+            'email': group['email'],
+            'lang': group['lang'],
+            'mail_id': mail.id,
+        } for group, mail in zip(groups, mails)])
+
+        # wake the mail queue up instead of waiting for its next scheduled run
+        self.env.ref('mail.ir_cron_mail_scheduler_action')._trigger()
+        _logger.info("Queued summary %s for %d recipient(s) in %d language(s)",
+                     self.id, len(mails), len({group['lang'] for group in groups}))
+        return recipients.sudo(False)
+
+    @api.model
+    def _create_from_ai(self, meeting_id, meeting_data, ai_result, user_id, input_hash=False):
+        """Store the result of an AI generation as a draft summary"""
+        return self.create({
+            'input_hash': input_hash,
+            'meeting_id': meeting_id,
+            'executive_summary': ai_result.get('executive_summary') or '',
+            'key_decisions': ai_result.get('key_decisions') or '',
+            'action_items_summary': ai_result.get('action_items_summary') or '',
+            'discussion_points': ai_result.get('discussion_points') or '',
+            'participants_summary': ', '.join(meeting_data['meeting']['participants']) if meeting_data[
+                'meeting'].get('participants') else '',
+            'raw_notes': json.dumps(meeting_data.get('notes', [])),
+            'raw_actions': json.dumps(meeting_data.get('actions', [])),
+            'state': 'draft',
+            'generated_by': user_id,
+            'ai_model_used': ai_result.get('model_used', 'Unknown'),
+            'prompt_token_budget': meeting_data.get('token_budget', 0),
+            'prompt_tokens_trimmed': meeting_data.get('tokens_trimmed', 0),
+        })
+
     @api.model
     def generate_summary_data(self, meeting_id):
-        """Prepare data for AI summary generation"""
+        """
+        Prepare data for AI summary generation.
+
+        Everything is loaded with one ``search_read`` per model, the many2one names coming
+        with the rows, so the cost does not grow with the number of sessions or actions.
+        ``token_estimate`` is the size of the resulting prompt, for the caller to choose
+        between a single prompt and the chunked pipeline before building anything.
+        """
         meeting = self.env['dw.meeting'].browse(meeting_id)
+        [meeting_row] = meeting.read(['name', 'objet', 'planned_start_datetime', 'planned_end_time',
+                                      'actual_end_datetime', 'actual_duration'], load=None)
+        meeting_domain = [('meeting_id', '=', meeting_id)]
 
-        # Gather all session notes
-        sessions = self.env['dw.meeting.session'].search([
-            ('meeting_id', '=', meeting_id)
-        ])
-
-        all_notes = []
-        for session in sessions:
-            if session.personal_notes:
-                all_notes.append({
-                    'participant': session.participant_id.name if session.participant_id else session.user_id.name,
-                    'notes': session.personal_notes
-                })
-
-        # Gather all actions
-        actions = self.env['dw.actions'].search([
-            ('meeting_id', '=', meeting_id)
-        ])
-
-        actions_data = []
-        for action in actions:
-            actions_data.append({
-                'title': action.name,
-                'assignee': action.assignee.name if action.assignee else 'Unassigned',
-                'due_date': action.dead_line.strftime('%Y-%m-%d') if action.dead_line else 'No deadline',
-                'priority': action.priority,
-                'status': action.status,
-                'description': action.description or ''
-            })
-
-        # Gather decisions (from notes model if exists, or parse from notes)
-        decisions = []
-        if 'dw.meeting.decision' in self.env:
-            decision_records = self.env['dw.meeting.decision'].search([
-                ('meeting_id', '=', meeting_id)
-            ])
-            for decision in decision_records:
-                decisions.append({
-                    'title': decision.title if hasattr(decision, 'title') else decision.name,
-                    'description': decision.description if hasattr(decision, 'description') else '',
-                    'decided_by': decision.decided_by_id.name if hasattr(decision,
-                                                                         'decided_by_id') and decision.decided_by_id else ''
-                })
+        agenda = self.env['dw.agenda'].search_read(meeting_domain, ['name'], order='id')
+        participants = self.env['dw.participant'].search_read(meeting_domain, ['name'], order='id')
+        sessions = self.env['dw.meeting.session'].search_read(
+            meeting_domain + [('personal_notes', '!=', False)],
+            ['participant_id', 'user_id', 'personal_notes', 'is_pv'], order='id')
+        actions = self.env['dw.actions'].search_read(
+            meeting_domain, ['name', 'assignee', 'dead_line', 'priority', 'status', 'description'], order='id')
+        decisions = self.env['dw.meeting.decision'].search_read(
+            meeting_domain, ['title', 'description', 'decided_by_id'], order='timestamp, id')
 
-        return {
+        end_time = meeting_row['actual_end_datetime'] or meeting_row['planned_end_time']
+        data = {
             'meeting': {
-                'name': meeting.name,
-                'objet': meeting.objet,
-                'start_time': meeting.planned_start_datetime.strftime('%Y-%m-%d %H:%M') if meeting.planned_start_datetime else '',
-                'planned_end_time': meeting.actual_end_time.strftime('%Y-%m-%d %H:%M') if meeting.actual_end_time else '',
-                'duration': meeting.actual_duration,
-                'agenda': meeting.subject_order,
-                'participants': [p.name for p in meeting.participant_ids]
+                'name': meeting_row['name'],
+                'objet': meeting_row['objet'],
+                'start_time': meeting_row['planned_start_datetime'].strftime('%Y-%m-%d %H:%M')
+                if meeting_row['planned_start_datetime'] else '',
+                'end_time': end_time.strftime('%Y-%m-%d %H:%M') if end_time else '',
+                'duration': meeting_row['actual_duration'],
+                'agenda': '\n'.join(f"{index}. {item['name']}" for index, item in enumerate(agenda, 1)),
+                'participants': [p['name'] for p in participants if p['name']],
             },
-            'notes': all_notes,
-            'actions': actions_data,
-            'decisions': decisions
-        }
\ No newline at end of file
+            'notes': [{
+                'participant': (session['participant_id'] or session['user_id'])[1],
+                'notes': session['personal_notes'],
+                'is_pv': session['is_pv'],
+            } for session in sessions],
+            'actions': [{
+                'title': action['name'],
+                'assignee': action['assignee'][1] if action['assignee'] else 'Unassigned',
+                'due_date': action['dead_line'].strftime('%Y-%m-%d') if action['dead_line'] else 'No deadline',
+                'priority': action['priority'],
+                'status': action['status'],
+                'description': action['description'] or '',
+            } for action in actions],
+            'decisions': [{
+                'title': decision['title'],
+                'description': decision['description'] or '',
+                'decided_by': decision['decided_by_id'][1] if decision['decided_by_id'] else '',
+            } for decision in decisions],
+        }
+        AI = self.env['dw.meeting.summary.ai']
+        data['token_estimate'] = AI._estimate_tokens(AI._build_summary_prompt(data))
+        return data
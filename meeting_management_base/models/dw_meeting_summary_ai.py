@@ -0,0 +1,1069 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from smartdz import models, api
+
+from ..tools import ai_http
+
+_logger = logging.getLogger(__name__)
+
+# Order in which the providers back each other up, after the configured one
+AI_PROVIDER_ORDER = ['gemini', 'groq', 'openrouter', 'huggingface']
+# Consecutive failures opening the circuit of a provider, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_OPEN_SECONDS = 120
+# Weight of the last call in the moving average latency
+LATENCY_EWMA_ALPHA = 0.3
+# Above this many prompt tokens the notes are summarised by chunks first (map-reduce)
+MAP_REDUCE_THRESHOLD_TOKENS = 12000
+# Notes tokens per chunk, and chunks summarised at the same time for one meeting
+CHUNK_TOKEN_BUDGET = 6000
+MAP_WORKERS = 4
+# Provider requests in flight at the same time in one worker, whatever pool they come from;
+# dw.meeting.summary.job sets it to the meeting_management_base.ai_summary_workers parameter
+PROVIDER_CALL_LIMIT = 4
+# Providers exposing a streaming API, and the minimum delay between two forwarded updates
+STREAMING_PROVIDERS = ('gemini', 'groq', 'openrouter')
+STREAM_FLUSH_SECONDS = 0.5
+# Notes paragraphs sharing this share of their words with an earlier one are dropped as duplicates
+NEAR_DUPLICATE_RATIO = 0.9
+NEAR_DUPLICATE_MIN_WORDS = 8
+DEFAULT_PROMPT_TOKEN_BUDGET = 12000
+TRUNCATION_MARK = '[...]'
+SUMMARY_SECTION_TAGS = {
+    'EXECUTIVE_SUMMARY': 'executive_summary',
+    'KEY_DECISIONS': 'key_decisions',
+    'ACTION_ITEMS_SUMMARY': 'action_items_summary',
+    'DISCUSSION_POINTS': 'discussion_points',
+}
+# Structured output: schema sent to the providers supporting one, and the instructions
+# replacing the tagged format at the end of the summary prompt
+SUMMARY_JSON_SCHEMA = {
+    'type': 'object',
+    'properties': {field: {'type': 'string'} for field in SUMMARY_SECTION_TAGS.values()},
+    'required': list(SUMMARY_SECTION_TAGS.values()),
+}
+TAGGED_FORMAT_MARKER = 'Please provide a structured summary with the following sections:'
+STRUCTURED_INSTRUCTIONS = """Answer with a single JSON object and nothing else, having exactly these string properties:
+
+- "executive_summary": a brief 2-3 sentence overview of the meeting
+- "key_decisions": all important decisions made, in HTML with <ul><li>
+- "action_items_summary": the action items organised by assignee with their deadlines, in HTML
+- "discussion_points": the key topics discussed and their outcomes, in HTML
+"""
+
+# per-worker health of each provider, shared by the job threads
+_provider_health = {}
+_provider_health_lock = threading.Lock()
+# per-worker time at which each rate limited provider accepts its next call
+_rate_next_slot = {}
+# per-worker outcome counts of the structured answers, by provider
+_parse_metrics = {}
+# per-worker slots bounding the provider requests in flight (jobs, map chunks and hedges together)
+_provider_call_limit = PROVIDER_CALL_LIMIT
+_provider_call_slots = threading.BoundedSemaphore(PROVIDER_CALL_LIMIT)
+
+
+def _health(provider):
+    return _provider_health.setdefault(provider, {
+        'calls': 0,
+        'failures': 0,
+        'consecutive_failures': 0,
+        'latency_ms': None,
+        'open_until': 0.0,
+        'last_error': None,
+    })
+
+
+def _provider_available(provider):
+    """Closed circuit, or open one whose cool-down elapsed (one trial call goes through)"""
+    with _provider_health_lock:
+        health = _health(provider)
+        if health['open_until'] and time.monotonic() >= health['open_until']:
+            # half-open: let this call through, a failure re-opens the circuit
+            health['open_until'] = time.monotonic() + CIRCUIT_OPEN_SECONDS
+            return True
+        return not health['open_until']
+
+
+def _record_call(provider, success, latency_ms, error=None):
+    with _provider_health_lock:
+        health = _health(provider)
+        health['calls'] += 1
+        if health['latency_ms'] is None:
+            health['latency_ms'] = latency_ms
+        else:
+            health['latency_ms'] += LATENCY_EWMA_ALPHA * (latency_ms - health['latency_ms'])
+        if success:
+            health['consecutive_failures'] = 0
+            health['open_until'] = 0.0
+            return
+        health['failures'] += 1
+        health['consecutive_failures'] += 1
+        health['last_error'] = error
+        if health['consecutive_failures'] >= CIRCUIT_FAILURE_THRESHOLD:
+            health['open_until'] = time.monotonic() + CIRCUIT_OPEN_SECONDS
+            _logger.warning("AI provider %s disabled for %ss after %s failures: %s",
+                            provider, CIRCUIT_OPEN_SECONDS, health['consecutive_failures'], error)
+
+
+def _wait_rate_slot(provider, per_minute):
+    """Block until ``provider`` may be called again without exceeding ``per_minute`` calls"""
+    if not per_minute:
+        return
+    with _provider_health_lock:
+        now = time.monotonic()
+        slot = max(_rate_next_slot.get(provider, now), now)
+        _rate_next_slot[provider] = slot + 60.0 / per_minute
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def _set_provider_call_limit(limit):
+    """Resize the provider call slots; the calls holding a slot of the old size release it as usual"""
+    global _provider_call_limit, _provider_call_slots
+    limit = max(limit, 1)
+    with _provider_health_lock:
+        if limit != _provider_call_limit:
+            _provider_call_limit = limit
+            _provider_call_slots = threading.BoundedSemaphore(limit)
+
+
+def _record_parse(provider, outcome):
+    """Count a structured answer that was ``valid``, ``repaired``, read by the tag parser (``fallback``) or lost"""
+    with _provider_health_lock:
+        metrics = _parse_metrics.setdefault(provider, {'valid': 0, 'repaired': 0, 'fallback': 0, 'failed': 0})
+        metrics[outcome] += 1
+
+
+class DwMeetingSummaryAI(models.AbstractModel):
+    """
+    Meeting summary generation using multiple free AI providers.
+    Supports: Google Gemini, OpenRouter, Groq, Hugging Face, and a local mock for load tests
+
+    A provider is an entry of _get_provider_configs plus a ``_call_<provider>(config, prompt)``
+    method returning ``{'success': True, <sections>, 'text', 'model_used'}``; other modules add
+    providers by extending both. The provider calls only use the configuration and the prompt
+    they receive, so dw.meeting.summary.job can run them in worker threads outside of any cursor.
+    """
+    _name = 'dw.meeting.summary.ai'
+    _description = 'Meeting Summary AI Providers'
+
+    def _get_ai_config(self, provider=None):
+        """Get AI provider configuration."""
+        config_param = self.env['ir.config_parameter'].sudo()
+
+        # Get provider choice (default to gemini if not set)
+        provider = provider or config_param.get_param('meeting_management_base.ai_provider', default='gemini')
+
+        configs = self._get_provider_configs()
+        config = configs.get(provider, configs['gemini'])
+        config['referer'] = self.get_base_url()
+        return provider, config
+
+    def _get_provider_configs(self):
+        """Configuration of every provider, by provider code"""
+        config_param = self.env['ir.config_parameter'].sudo()
+        structured = bool(config_param.get_param('meeting_management_base.ai_structured_output'))
+
+        # Get API keys for different providers
+        return {
+            'gemini': {
+                'api_key': config_param.get_param('meeting_management_base.gemini_api_key') or os.environ.get(
+                    'GEMINI_API_KEY'),
+                'url': 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent',
+                'model': 'gemini-2.5-flash',
+                'token_budget': 48000,
+                'label': 'Google Gemini Pro (Free)',
+                'structured_output': structured,
+            },
+            'openrouter': {
+                'api_key': config_param.get_param('meeting_management_base.openrouter_api_key') or os.environ.get(
+                    'OPENROUTER_API_KEY'),
+                'url': 'https://openrouter.ai/api/v1/chat/completions',
+                'model': 'deepseek/deepseek-chat',  # Free model
+                'token_budget': 24000,
+                'label': 'DeepSeek via OpenRouter (Free)',
+                'structured_output': structured,
+            },
+            'groq': {
+                'api_key': config_param.get_param('meeting_management_base.groq_api_key') or os.environ.get(
+                    'GROQ_API_KEY'),
+                'url': 'https://api.groq.com/openai/v1/chat/completions',
+                'model': 'llama-3.3-70b-versatile',  # Fast and free
+                'token_budget': 12000,
+                'label': 'Llama 3.3 via Groq (Free)',
+                'structured_output': structured,
+            },
+            'huggingface': {
+                'api_key': config_param.get_param('meeting_management_base.huggingface_api_key') or os.environ.get(
+                    'HUGGINGFACE_API_KEY'),
+                'url': 'https://api-inference.huggingface.co/models/mistralai/Mixtral-8x7B-Instruct-v0.1',
+                'model': 'mistralai/Mixtral-8x7B-Instruct-v0.1',
+                'token_budget': 6000,
+            },
+            # local stand-in answering without any network call, for load tests
+            'mock': {
+                'requires_key': False,
+                'model': 'mock',
+                'label': 'Local mock provider',
+                'structured_output': structured,
+                'token_budget': 48000,
+                'latency_ms': float(config_param.get_param('meeting_management_base.ai_mock_latency_ms', 800)),
+                'jitter_ms': float(config_param.get_param('meeting_management_base.ai_mock_jitter_ms', 200)),
+                'error_rate': float(config_param.get_param('meeting_management_base.ai_mock_error_rate', 0)),
+                'response': config_param.get_param('meeting_management_base.ai_mock_response') or '',
+            },
+        }
+
+    def _get_provider_chain(self):
+        """
+        Providers to try, in order: the configured one, then the others having an API key
+        when the fallback is enabled.
+
+        :return: ([(provider, config)], hedge_delay in seconds or 0)
+        """
+        config_param = self.env['ir.config_parameter'].sudo()
+        primary, primary_config = self._get_ai_config()
+        chain = [(primary, primary_config)]
+        if config_param.get_param('meeting_management_base.ai_provider_fallback'):
+            for provider in AI_PROVIDER_ORDER:
+                if provider == primary:
+                    continue
+                config = self._get_ai_config(provider)[1]
+                if config.get('api_key'):
+                    chain.append((provider, config))
+        hedge_delay = float(config_param.get_param('meeting_management_base.ai_hedge_delay') or 0)
+        return chain, hedge_delay
+
+    @api.model
+    def get_provider_health(self):
+        """Snapshot of the provider statistics of this worker, with the HTTP and parsing metrics"""
+        http_metrics = ai_http.get_metrics()
+        with _provider_health_lock:
+            return {provider: dict(health, open=bool(health['open_until']), http=http_metrics.get(provider, {}),
+                                   parsing=dict(_parse_metrics.get(provider, {})))
+                    for provider, health in _provider_health.items()}
+
+    @api.model
+    def _set_call_limit(self, limit):
+        """Number of provider requests this worker may have in flight at the same time"""
+        _set_provider_call_limit(limit)
+
+    def _generate_with_ai(self, meeting_data):
+        """Generate summary using configured AI provider."""
+        chain, hedge_delay = self._get_provider_chain()
+        return self._execute_plan(chain, self._plan_summary(meeting_data, self._get_token_budget(chain)), hedge_delay)
+
+    @api.model
+    def _estimate_tokens(self, text):
+        """Rough token count (about 4 characters per token), enough to pick a strategy"""
+        return len(text or '') // 4 + 1
+
+    def _split_notes(self, notes, budget=CHUNK_TOKEN_BUDGET):
+        """Pack the notes into chunks of at most ``budget`` tokens, splitting long notes on paragraphs"""
+        pieces = []
+        for note in notes:
+            paragraphs = [p for p in (note.get('notes') or '').split('\n\n') if p.strip()]
+            current = ''
+            for paragraph in paragraphs:
+                # a single huge paragraph is cut on characters
+                while self._estimate_tokens(paragraph) > budget:
+                    pieces.append((note.get('participant'), paragraph[:budget * 4]))
+                    paragraph = paragraph[budget * 4:]
+                if current and self._estimate_tokens(current + paragraph) > budget:
+                    pieces.append((note.get('participant'), current))
+                    current = ''
+                current = f"{current}\n\n{paragraph}" if current else paragraph
+            if current:
+                pieces.append((note.get('participant'), current))
+
+        chunks, chunk, size = [], [], 0
+        for participant, text in pieces:
+            tokens = self._estimate_tokens(f"\n{participant or 'Unknown'}:\n{text}\n")
+            if chunk and size + tokens > budget:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append({'participant': participant, 'notes': text})
+            size += tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _build_chunk_prompt(self, meeting_data, notes, index, total):
+        meeting = meeting_data.get('meeting', {})
+        prompt = f"""You are a professional meeting secretary. The notes of the meeting "{meeting.get('name', '')}" are too long to be read at once; this is part {index} of {total}.
+
+Summarise this part as concise bullet points covering the topics discussed, the decisions taken and the actions agreed (with owners and deadlines when given). Keep names, figures and dates. Do not add an introduction.
+
+**PARTICIPANT NOTES (part {index}/{total}):**
+"""
+        for note in notes:
+            prompt += f"\n{note.get('participant') or 'Unknown'}:\n{note.get('notes', '')}\n"
+        return prompt
+
+    def _get_token_budget(self, chain):
+        """Input tokens allowed for a summary: the primary provider's, unless capped in the settings"""
+        budget = chain[0][1].get('token_budget') if chain else DEFAULT_PROMPT_TOKEN_BUDGET
+        cap = int(self.env['ir.config_parameter'].sudo().get_param(
+            'meeting_management_base.ai_prompt_token_budget', 0) or 0)
+        return min(budget, cap) if cap > 0 else budget
+
+    def _dedupe_notes(self, notes):
+        """
+        Drop the notes paragraphs already written by someone else (or earlier by the same person).
+
+        Paragraphs are compared on their lowercased words, so spacing, case and punctuation
+        differences do not matter; long paragraphs sharing NEAR_DUPLICATE_RATIO of their
+        words with a kept one are dropped too. Only the kept paragraphs sharing one of two
+        min-hash words are compared, which keeps long transcripts linear; two paragraphs that
+        similar share each min-hash word with a probability of at least NEAR_DUPLICATE_RATIO.
+        """
+        seen, buckets, result = set(), {}, []
+        for note in notes:
+            paragraphs = []
+            for paragraph in re.split(r'\n\s*\n', note.get('notes') or ''):
+                words = re.findall(r'\w+', paragraph.lower())
+                key = ' '.join(words)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                word_set = frozenset(words)
+                if len(word_set) >= NEAR_DUPLICATE_MIN_WORDS:
+                    # crc32 rather than hash(): the outcome must not change between processes
+                    signature = [(seed, min(word_set, key=lambda w: zlib.crc32(f"{seed}:{w}".encode())))
+                                 for seed in (0, 1)]
+                    candidates = {other for band in signature for other in buckets.get(band, ())}
+                    if any(
+                        min(len(word_set), len(other)) >= NEAR_DUPLICATE_RATIO * max(len(word_set), len(other))
+                        and len(word_set & other) >= NEAR_DUPLICATE_RATIO * len(word_set | other)
+                        for other in candidates
+                    ):
+                        continue
+                    for band in signature:
+                        buckets.setdefault(band, []).append(word_set)
+                paragraphs.append(paragraph.strip())
+            if paragraphs:
+                result.append(dict(note, notes='\n\n'.join(paragraphs)))
+        return result
+
+    def _truncate_text(self, text, tokens):
+        """Cut ``text`` to about ``tokens`` tokens, on a paragraph or word boundary when possible"""
+        limit = max(tokens, 0) * 4
+        if len(text) <= limit:
+            return text
+        cut = text.rfind('\n\n', 0, limit)
+        if cut < limit // 2:
+            cut = text.rfind(' ', 0, limit)
+        if cut <= 0:
+            cut = limit
+        return f"{text[:cut].rstrip()}\n{TRUNCATION_MARK}" if cut else ''
+
+    def _fit_to_budget(self, meeting_data, budget):
+        """
+        Copy of ``meeting_data`` whose summary prompt fits in ``budget`` tokens.
+
+        Duplicate notes are removed first. The content is then kept by rank: decisions, the
+        notes of the PV writers, the actions, then the other notes. When notes of the same
+        rank do not fit, the budget left is shared evenly between them, small notes being
+        kept whole and the others cut at the same length; the result only depends on the data.
+        ``token_budget``, ``tokens_trimmed`` and ``token_estimate`` describe what was done.
+        """
+        original = meeting_data.get('token_estimate')
+        if original is None:
+            original = self._estimate_tokens(self._build_summary_prompt(meeting_data))
+        notes = self._dedupe_notes(meeting_data.get('notes', []))
+        empty = dict(meeting_data, notes=[], actions=[], decisions=[])
+        remaining = budget - self._estimate_tokens(self._build_summary_prompt(empty))
+
+        def keep_lines(items, line):
+            nonlocal remaining
+            kept = []
+            for item in items:
+                cost = self._estimate_tokens(line(item))
+                if cost > remaining:
+                    break
+                kept.append(item)
+                remaining -= cost
+            return kept
+
+        def keep_notes(group):
+            nonlocal remaining
+            kept = {}
+            # smallest first, so the even share left to the bigger ones only grows
+            order = sorted(range(len(group)), key=lambda i: (len(group[i]['notes']), i))
+            for position, index in enumerate(order):
+                note = group[index]
+                overhead = self._estimate_tokens(f"\n{note.get('participant')}:\n\n")
+                share = remaining // (len(order) - position) - overhead
+                text = self._truncate_text(note['notes'], share)
+                if text:
+                    kept[index] = dict(note, notes=text)
+                    remaining -= overhead + self._estimate_tokens(text)
+            return [kept[index] for index in sorted(kept)]
+
+        decisions = keep_lines(meeting_data.get('decisions', []),
+                               lambda d: f"- {d.get('title', '')}: {d.get('description', '')}\n")
+        pv_notes = keep_notes([note for note in notes if note.get('is_pv')])
+        actions = keep_lines(meeting_data.get('actions', []),
+                             lambda a: f"- {a.get('title', '')} (Assigned to: {a.get('assignee', '')}, "
+                                       f"Due: {a.get('due_date', '')}, Priority: {a.get('priority', '')})\n")
+        other_notes = keep_notes([note for note in notes if not note.get('is_pv')])
+
+        data = dict(meeting_data, notes=pv_notes + other_notes, actions=actions, decisions=decisions)
+        data['token_estimate'] = self._estimate_tokens(self._build_summary_prompt(data))
+        data['token_budget'] = budget
+        data['tokens_trimmed'] = max(original - data['token_estimate'], 0)
+        return data
+
+    def _plan_summary(self, meeting_data, budget):
+        """
+        Prompt(s) to send for ``meeting_data``, built on the cursor before the provider calls.
+
+        Meetings whose deduplicated notes fit in one prompt of ``budget`` tokens (and below
+        MAP_REDUCE_THRESHOLD_TOKENS) get one, cut by _fit_to_budget when the decisions and
+        actions alone are too long. Otherwise the notes are split in chunks fitting the budget;
+        each chunk is summarised on its own and the final prompt, fitted to the budget when
+        run, is built from the chunk summaries instead of the raw notes, so no note is cut.
+        The ``meeting_data`` of the plan is the input the summary depends on, to hash and store.
+        """
+        original = meeting_data.get('token_estimate')
+        data = dict(meeting_data, notes=self._dedupe_notes(meeting_data.get('notes', [])))
+        token_estimate = self._estimate_tokens(self._build_summary_prompt(data))
+        if original is None:
+            original = token_estimate
+        if token_estimate <= min(MAP_REDUCE_THRESHOLD_TOKENS, budget) or not data['notes']:
+            data = self._fit_to_budget(meeting_data, budget)
+            return {'mode': 'single', 'meeting_data': data, 'prompt': self._build_summary_prompt(data)}
+
+        header = self._estimate_tokens(self._build_chunk_prompt(data, [], 999, 999))
+        chunks = self._split_notes(data['notes'], max(min(CHUNK_TOKEN_BUDGET, budget - header), 1))
+        data.update(token_estimate=token_estimate, token_budget=budget,
+                    tokens_trimmed=max(original - token_estimate, 0))
+        return {
+            'mode': 'map_reduce',
+            'meeting_data': data,
+            'chunk_prompts': [
+                self._build_chunk_prompt(data, chunk, index, len(chunks))
+                for index, chunk in enumerate(chunks, 1)
+            ],
+        }
+
+    def _execute_plan(self, chain, plan, hedge_delay=0, on_sections=None):
+        """
+        Run a plan from _plan_summary; uses no cursor, the chunks run concurrently.
+
+        Whatever the threads, at most PROVIDER_CALL_LIMIT provider requests are in flight
+        in the worker: the chunks and hedged calls of every job share the same slots.
+
+        :param on_sections: when given, the final prompt is streamed and the callback receives
+            the sections parsed so far each time they grow
+        """
+        if plan['mode'] == 'single':
+            return self._generate_final(chain, plan['prompt'], hedge_delay, on_sections)
+
+        chunk_prompts = plan['chunk_prompts']
+        with ThreadPoolExecutor(max_workers=min(MAP_WORKERS, len(chunk_prompts)),
+                                thread_name_prefix='dw_summary_map') as executor:
+            results = list(executor.map(lambda prompt: self._generate_with_chain(chain, prompt, hedge_delay),
+                                        chunk_prompts))
+        failed = [result for result in results if not result.get('success')]
+        if failed:
+            return {'success': False, 'error': f"{len(failed)}/{len(results)} note chunk(s) failed: "
+                                               f"{failed[0].get('error')}"}
+
+        meeting_data = self._fit_to_budget(dict(plan['meeting_data'], notes=[
+            {'participant': f"Notes summary, part {index}/{len(results)}", 'notes': result.get('text', '')}
+            for index, result in enumerate(results, 1)
+        ]), plan['meeting_data']['token_budget'])
+        return self._generate_final(chain, self._build_summary_prompt(meeting_data), hedge_delay, on_sections)
+
+    def _generate_final(self, chain, prompt, hedge_delay=0, on_sections=None):
+        """Stream the prompt from the first available streaming provider, else use the chain"""
+        if on_sections:
+            for provider, config in chain:
+                if provider not in STREAMING_PROVIDERS or not config.get('api_key') \
+                        or not _provider_available(provider):
+                    continue
+                result = self._timed_stream(provider, config, prompt, on_sections)
+                if result.get('success'):
+                    return result
+                # nothing usable came out of the stream, the other providers are tried as usual
+                chain = [(p, c) for p, c in chain if p != provider]
+                break
+        return self._generate_with_chain(chain, prompt, hedge_delay)
+
+    def _timed_stream(self, provider, config, prompt, on_sections):
+        with _provider_call_slots:
+            start = time.monotonic()
+            try:
+                result = self._stream_provider(provider, config, prompt, on_sections)
+            except Exception as e:
+                _logger.exception("%s streaming call failed: %s", provider, e)
+                result = {'success': False, 'error': str(e)}
+            latency_ms = (time.monotonic() - start) * 1000
+        _record_call(provider, result.get('success'), latency_ms, result.get('error'))
+        result.update(provider=provider, model=config.get('model'), latency_ms=round(latency_ms))
+        return result
+
+    def _stream_provider(self, provider, config, prompt, on_sections):
+        """Read the provider's server-sent events and forward the growing sections"""
+        sent_prompt = prompt
+        if self._use_structured_output(config, prompt):
+            config = dict(config, structured=True)
+            sent_prompt = self._to_structured_prompt(prompt)
+        if provider == 'gemini':
+            url = config['url'].replace(':generateContent', ':streamGenerateContent')
+            response = ai_http.post_json(provider, f"{url}?alt=sse&key={config['api_key']}", {
+                'contents': [{'parts': [{'text': sent_prompt}]}],
+                'generationConfig': dict({'temperature': 0.7, 'maxOutputTokens': 4000},
+                                         **self._gemini_structured_options(config)),
+            }, headers={'Content-Type': 'application/json'}, read_timeout=30, stream=True)
+        else:
+            response = ai_http.post_json(provider, config['url'], {
+                'model': config['model'],
+                'messages': [{'role': 'user', 'content': sent_prompt}],
+                'max_tokens': 4000,
+                'temperature': 0.7,
+                'stream': True,
+                **self._chat_structured_options(config),
+            }, headers={
+                'Content-Type': 'application/json',
+                'Authorization': f"Bearer {config['api_key']}",
+                'HTTP-Referer': config.get('referer', ''),
+            }, read_timeout=30, stream=True)
+
+        with response:
+            if response.status_code >= 400:
+                return {'success': False, 'error': f'{provider} streaming error: HTTP {response.status_code}'}
+            text = ''
+            sent = None
+            last_flush = 0.0
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                text += self._stream_delta(provider, json.loads(data))
+                if time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS:
+                    sections = self._partial_sections(text)
+                    if sections and sections != sent:
+                        on_sections(sections)
+                        sent, last_flush = sections, time.monotonic()
+
+        if not text:
+            return {'success': False, 'error': f'Empty response from {provider}'}
+        result = {'success': True, **self._parse_ai_response(text), 'text': text,
+                  'model_used': config.get('label', provider)}
+        if config.get('structured'):
+            result = self._apply_structured_output(provider, config, prompt, result,
+                                                   getattr(self, f'_call_{provider}'))
+        if result.get('success'):
+            on_sections({field: result.get(field) or '' for field in SUMMARY_SECTION_TAGS.values()})
+        return result
+
+    def _stream_delta(self, provider, event):
+        """Text added by one streamed event"""
+        if provider == 'gemini':
+            parts = (event.get('candidates') or [{}])[0].get('content', {}).get('parts', [])
+            return ''.join(part.get('text', '') for part in parts)
+        return ((event.get('choices') or [{}])[0].get('delta') or {}).get('content') or ''
+
+    def _partial_sections(self, text):
+        """Sections found so far in a response still being received, open sections included"""
+        sections = {}
+        if text.lstrip().startswith('{'):
+            # structured answer: the string values, the last one possibly unterminated
+            for field in SUMMARY_SECTION_TAGS.values():
+                match = re.search(r'"' + field + r'"\s*:\s*"((?:[^"\\]|\\.)*)', text)
+                if not match:
+                    continue
+                # drop an escape sequence cut in the middle
+                value = re.sub(r'\\(u[0-9a-fA-F]{0,3})?$', '', match.group(1))
+                try:
+                    value = json.loads(f'"{value}"').strip()
+                except ValueError:
+                    continue
+                if value:
+                    sections[field] = value
+            return sections
+        for tag, field in SUMMARY_SECTION_TAGS.items():
+            match = re.search(r'\[' + tag + r'\](.*?)(?:\[/' + tag + r'\]|\[[A-Z_]+\]|$)', text, re.DOTALL)
+            if match and match.group(1).strip():
+                sections[field] = match.group(1).strip()
+        return sections
+
+    def _timed_call(self, provider, config, prompt, take_slot=True):
+        # the waiting time does not count in the provider latency
+        _wait_rate_slot(provider, config.get('rate_per_minute'))
+        with _provider_call_slots if take_slot else contextlib.nullcontext():
+            start = time.monotonic()
+            try:
+                result = self._run_provider(provider, config, prompt)
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            latency_ms = (time.monotonic() - start) * 1000
+        _record_call(provider, result.get('success'), latency_ms, result.get('error'))
+        result.update(provider=provider, model=config.get('model'), latency_ms=round(latency_ms))
+        return result
+
+    def _generate_with_chain(self, chain, prompt, hedge_delay=0):
+        """
+        Try the providers of ``chain`` in order, skipping those whose circuit is open.
+
+        With ``hedge_delay``, a provider still running after that many seconds is raced
+        against the next one and the first valid response wins. Uses no cursor.
+
+        A race takes one provider call slot, given back as soon as it is decided: the losing
+        request finishing in the background does not keep another job waiting.
+        """
+        candidates = [(provider, config) for provider, config in chain if _provider_available(provider)]
+        if not candidates:
+            return {'success': False, 'error': 'All AI providers are temporarily unavailable, retry later.'}
+
+        errors = []
+        if not hedge_delay:
+            for provider, config in candidates:
+                result = self._timed_call(provider, config, prompt)
+                if result.get('success'):
+                    return result
+                errors.append(f"{provider}: {result.get('error')}")
+            return {'success': False, 'error': '; '.join(errors)}
+
+        executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix='dw_summary_hedge')
+        pending = {}
+
+        def launch():
+            provider, config = candidates.pop(0)
+            pending[executor.submit(self._timed_call, provider, config, prompt, False)] = provider
+
+        slots = _provider_call_slots
+        slots.acquire()
+        try:
+            launch()
+            while pending:
+                # the hedge only fires while a single request is in flight
+                timeout = hedge_delay if candidates and len(pending) == 1 else None
+                done, _not_done = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    _logger.info("AI provider %s slower than %ss, hedging", next(iter(pending.values())), hedge_delay)
+                    launch()
+                    continue
+                for future in done:
+                    provider = pending.pop(future)
+                    result = future.result()
+                    if result.get('success'):
+                        return result
+                    errors.append(f"{provider}: {result.get('error')}")
+                if not pending and candidates:
+                    launch()
+            return {'success': False, 'error': '; '.join(errors)}
+        finally:
+            slots.release()
+            # the losing request finishes in the background, its result is only recorded in the stats
+            executor.shutdown(wait=False)
+
+    def _run_provider(self, provider, config, prompt):
+        """Call one provider; does not use the cursor, so it can run in the job worker threads."""
+        call = getattr(self, f'_call_{provider}', None)
+        if call is None:
+            return {'success': False, 'error': 'Unknown AI provider'}
+        if config.get('requires_key', True) and not config.get('api_key'):
+            _logger.error(f"{provider.upper()} API key not configured")
+            return {'success': False,
+                    'error': f'{provider.upper()} API key not configured. Get free key from documentation.'}
+        if not self._use_structured_output(config, prompt):
+            return call(config, prompt)
+        config = dict(config, structured=True)
+        result = call(config, self._to_structured_prompt(prompt))
+        if not result.get('success'):
+            return result
+        return self._apply_structured_output(provider, config, prompt, result, call)
+
+    def _use_structured_output(self, config, prompt):
+        """Structured output is used for the summary prompts (not the chunk ones) when enabled"""
+        return bool(config.get('structured_output')) and TAGGED_FORMAT_MARKER in prompt
+
+    def _to_structured_prompt(self, prompt):
+        """Replace the tagged format instructions at the end of a summary prompt by the JSON ones"""
+        return prompt[:prompt.index(TAGGED_FORMAT_MARKER)] + STRUCTURED_INSTRUCTIONS
+
+    def _gemini_structured_options(self, config):
+        if not config.get('structured'):
+            return {}
+        return {'responseMimeType': 'application/json', 'responseSchema': SUMMARY_JSON_SCHEMA}
+
+    def _chat_structured_options(self, config):
+        """OpenAI-compatible APIs only guarantee JSON, the schema is checked on reception"""
+        return {'response_format': {'type': 'json_object'}} if config.get('structured') else {}
+
+    def _parse_structured(self, text):
+        """
+        Sections of a structured answer, validated strictly.
+
+        :return: (sections, None), or (None, the reason the answer is invalid)
+        """
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            return None, f"invalid JSON ({e})"
+        if not isinstance(data, dict):
+            return None, "not a JSON object"
+        fields = set(SUMMARY_JSON_SCHEMA['required'])
+        if set(data) != fields:
+            missing, unknown = sorted(fields - set(data)), sorted(set(data) - fields)
+            return None, f"missing properties {missing}, unknown properties {unknown}"
+        not_strings = sorted(key for key, value in data.items() if not isinstance(value, str))
+        if not_strings:
+            return None, f"non-string properties {not_strings}"
+        if not data['executive_summary'].strip():
+            return None, "empty executive_summary"
+        return {key: value.strip() for key, value in data.items()}, None
+
+    def _build_repair_prompt(self, text, error):
+        return f"""The answer below should be a single JSON object having exactly the string properties executive_summary, key_decisions, action_items_summary and discussion_points, but it is invalid: {error}.
+
+Return only the corrected JSON object, keeping the same content.
+
+{text}"""
+
+    def _apply_structured_output(self, provider, config, prompt, result, call):
+        """
+        Validate a structured answer, asking ``call`` once for a repaired one when it is invalid.
+
+        When the repair fails too, the original tagged ``prompt`` is sent once without the
+        structured options and read by the tag parser; the result fails if that finds no
+        section either, so the next provider is tried instead of storing an empty summary.
+        """
+        sections, error = self._parse_structured(result.get('text', ''))
+        outcome = 'valid'
+        if error:
+            _logger.info("%s structured answer invalid (%s), asking for a repair", provider, error)
+            repair = call(config, self._build_repair_prompt(result.get('text', ''), error))
+            if repair.get('success'):
+                sections, repair_error = self._parse_structured(repair.get('text', ''))
+                if not repair_error:
+                    outcome, error = 'repaired', None
+                    result = dict(result, text=repair['text'])
+        if error:
+            _logger.warning("%s structured answer unusable after repair (%s), asking for the tagged format",
+                            provider, error)
+            tagged = call(dict(config, structured=False), prompt)
+            sections = self._parse_ai_response(tagged.get('text', '')) if tagged.get('success') else {}
+            outcome = 'fallback' if any(sections.values()) else 'failed'
+            if outcome == 'fallback':
+                result = dict(result, text=tagged['text'])
+        _record_parse(provider, outcome)
+        if outcome == 'failed':
+            return {'success': False, 'error': f"{provider} answer could not be parsed: {error}"}
+        return dict(result, **sections)
+
+    def _call_gemini(self, config, prompt):
+        """Call Google Gemini API (FREE - No credit card required)"""
+        try:
+            url = f"{config['url']}?key={config['api_key']}"
+            headers = {'Content-Type': 'application/json'}
+
+            payload = {
+                'contents': [{
+                    'parts': [{'text': prompt}]
+                }],
+                'generationConfig': {
+                    'temperature': 0.7,
+                    'maxOutputTokens': 4000,
+                    **self._gemini_structured_options(config),
+                }
+            }
+
+            resp = ai_http.post_json('gemini', url, payload, headers=headers, read_timeout=30)
+
+            if resp.status_code >= 400:
+                _logger.error("Gemini API error: %s - %s", resp.status_code, resp.text[:500])
+                return {'success': False, 'error': f'Gemini API error: HTTP {resp.status_code}'}
+
+            data = resp.json()
+
+            # Extract text from Gemini response
+            ai_text = ''
+            if 'candidates' in data and data['candidates']:
+                candidate = data['candidates'][0]
+                if 'content' in candidate and 'parts' in candidate['content']:
+                    ai_text = ' '.join([part.get('text', '') for part in candidate['content']['parts']])
+
+            if not ai_text:
+                return {'success': False, 'error': 'Empty response from Gemini'}
+
+            parsed = self._parse_ai_response(ai_text)
+            parsed['text'] = ai_text
+            parsed['model_used'] = 'Google Gemini Pro (Free)'
+            return {'success': True, **parsed}
+
+        except Exception as e:
+            _logger.exception("Gemini API call failed: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def _call_openrouter(self, config, prompt):
+        """Call OpenRouter API (FREE models available)"""
+        try:
+            headers = {
+                'Content-Type': 'application/json',
+                'Authorization': f"Bearer {config['api_key']}",
+                'HTTP-Referer': config.get('referer', ''),
+            }
+
+            payload = {
+                'model': config['model'],
+                'messages': [
+                    {'role': 'user', 'content': prompt}
+                ],
+                'max_tokens': 4000,
+                'temperature': 0.7,
+                **self._chat_structured_options(config),
+            }
+
+            resp = ai_http.post_json('openrouter', config['url'], payload, headers=headers, read_timeout=30)
+
+            if resp.status_code >= 400:
+                return {'success': False, 'error': f'OpenRouter error: HTTP {resp.status_code}'}
+
+            data = resp.json()
+            ai_text = data['choices'][0]['message']['content'] if 'choices' in data else ''
+
+            if not ai_text:
+                return {'success': False, 'error': 'Empty response from OpenRouter'}
+
+            parsed = self._parse_ai_response(ai_text)
+            parsed['text'] = ai_text
+            parsed['model_used'] = 'DeepSeek via OpenRouter (Free)'
+            return {'success': True, **parsed}
+
+        except Exception as e:
+            _logger.exception("OpenRouter API call failed: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def _call_groq(self, config, prompt):
+        """Call Groq API (FREE tier available)"""
+        try:
+            headers = {
+                'Content-Type': 'application/json',
+                'Authorization': f"Bearer {config['api_key']}",
+            }
+
+            payload = {
+                'model': config['model'],
+                'messages': [
+                    {'role': 'user', 'content': prompt}
+                ],
+                'max_tokens': 4000,
+                'temperature': 0.7,
+                **self._chat_structured_options(config),
+            }
+
+            resp = ai_http.post_json('groq', config['url'], payload, headers=headers, read_timeout=30)
+
+            if resp.status_code >= 400:
+                return {'success': False, 'error': f'Groq error: HTTP {resp.status_code}'}
+
+            data = resp.json()
+            ai_text = data['choices'][0]['message']['content'] if 'choices' in data else ''
+
+            if not ai_text:
+                return {'success': False, 'error': 'Empty response from Groq'}
+
+            parsed = self._parse_ai_response(ai_text)
+            parsed['text'] = ai_text
+            parsed['model_used'] = 'Llama 3.3 via Groq (Free)'
+            return {'success': True, **parsed}
+
+        except Exception as e:
+            _logger.exception("Groq API call failed: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def _call_mock(self, config, prompt):
+        """
+        Answer locally after a random delay, failing at the configured rate.
+
+        The answer is the configured response, where ``{title}`` is replaced by the meeting
+        title, or a templated summary echoing the start of the prompt.
+        """
+        delay_ms = random.gauss(config.get('latency_ms', 0), config.get('jitter_ms', 0))
+        time.sleep(max(delay_ms, 0) / 1000)
+        if random.random() < config.get('error_rate', 0):
+            return {'success': False, 'error': 'Mock provider error (simulated)'}
+
+        match = re.search(r'^- Title: (.*)$', prompt, re.MULTILINE)
+        title = match.group(1).strip() if match else ''
+        if config.get('structured') and not config.get('response'):
+            ai_text = json.dumps({
+                'executive_summary': f"<p>Mock summary of the meeting {title}, generated from a "
+                                     f"{len(prompt)} character prompt.</p>",
+                'key_decisions': '<ul><li>No decision: this summary comes from the mock provider.</li></ul>',
+                'action_items_summary': '<ul><li>Nothing to do.</li></ul>',
+                'discussion_points': f"<p>{prompt[:200]}</p>",
+            })
+            return {'success': True, **self._parse_ai_response(ai_text), 'text': ai_text,
+                    'model_used': config.get('label', 'mock')}
+        ai_text = config.get('response', '').replace('{title}', title) or f"""[EXECUTIVE_SUMMARY]
+<p>Mock summary of the meeting {title}, generated from a {len(prompt)} character prompt.</p>
+[/EXECUTIVE_SUMMARY]
+
+[KEY_DECISIONS]
+<ul><li>No decision: this summary comes from the mock provider.</li></ul>
+[/KEY_DECISIONS]
+
+[ACTION_ITEMS_SUMMARY]
+<ul><li>Nothing to do.</li></ul>
+[/ACTION_ITEMS_SUMMARY]
+
+[DISCUSSION_POINTS]
+<p>{prompt[:200]}</p>
+[/DISCUSSION_POINTS]
+"""
+        parsed = self._parse_ai_response(ai_text)
+        parsed['text'] = ai_text
+        parsed['model_used'] = config.get('label', 'mock')
+        return {'success': True, **parsed}
+
+    def _call_huggingface(self, config, prompt):
+        """Call Hugging Face Inference API (FREE tier available)"""
+        try:
+            headers = {
+                'Authorization': f"Bearer {config['api_key']}",
+                'Content-Type': 'application/json',
+            }
+
+            payload = {
+                'inputs': prompt,
+                'parameters': {
+                    'max_new_tokens': 4000,
+                    'temperature': 0.7,
+                    'return_full_text': False,
+                }
+            }
+
+            resp = ai_http.post_json('huggingface', config['url'], payload, headers=headers, read_timeout=60)
+
+            if resp.status_code >= 400:
+                return {'success': False, 'error': f'Hugging Face error: HTTP {resp.status_code}'}
+
+            data = resp.json()
+            ai_text = data[0]['generated_text'] if isinstance(data, list) and data else ''
+
+            if not ai_text:
+                return {'success': False, 'error': 'Empty response from Hugging Face'}
+
+            parsed = self._parse_ai_response(ai_text)
+            parsed['text'] = ai_text
+            parsed['model_used'] = 'Mixtral via Hugging Face (Free)'
+            return {'success': True, **parsed}
+
+        except Exception as e:
+            _logger.exception("Hugging Face API call failed: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def _build_summary_prompt(self, meeting_data):
+        """Build the prompt sent to the AI."""
+        meeting = meeting_data.get('meeting', {})
+        notes = meeting_data.get('notes', [])
+        actions = meeting_data.get('actions', [])
+        decisions = meeting_data.get('decisions', [])
+
+        prompt = f"""You are a professional meeting secretary. Generate a comprehensive meeting summary based on the following information:
+
+**MEETING DETAILS:**
+- Title: {meeting.get('name', '')}
+- Subject: {meeting.get('objet', '')}
+- Date: {meeting.get('start_time', '')}
+- Duration: {meeting.get('duration', '')} hours
+- Participants: {', '.join(meeting.get('participants', []))}
+
+**AGENDA:**
+{meeting.get('agenda', '')}
+
+**PARTICIPANT NOTES:**
+"""
+
+        for note in notes:
+            participant = note.get('participant', 'Unknown')
+            note_text = note.get('notes', '')
+            prompt += f"\n{participant}:\n{note_text}\n"
+
+        prompt += "\n**ACTION ITEMS:**\n"
+        for action in actions:
+            prompt += "- {title} (Assigned to: {assignee}, Due: {due_date}, Priority: {priority})\n".format(
+                title=action.get('title', ''),
+                assignee=action.get('assignee', 'Unassigned'),
+                due_date=action.get('due_date', 'No deadline'),
+                priority=action.get('priority', '')
+            )
+
+        if decisions:
+            prompt += "\n**DECISIONS MADE:**\n"
+            for decision in decisions:
+                prompt += "- {title}: {description}\n".format(
+                    title=decision.get('title', ''),
+                    description=decision.get('description', '')
+                )
+
+        prompt += """
+
+Please provide a structured summary with the following sections:
+
+1. EXECUTIVE_SUMMARY: A brief 2-3 sentence overview of the meeting
+2. KEY_DECISIONS: List all important decisions made (in HTML format with <ul><li>)
+3. ACTION_ITEMS_SUMMARY: Organize action items by assignee with deadlines (in HTML format)
+4. DISCUSSION_POINTS: Key topics discussed and outcomes (in HTML format with proper formatting)
+
+Format your response EXACTLY like this:
+
+[EXECUTIVE_SUMMARY]
+Your executive summary here
+[/EXECUTIVE_SUMMARY]
+
+[KEY_DECISIONS]
+<ul>
+<li>Decision 1</li>
+<li>Decision 2</li>
+</ul>
+[/KEY_DECISIONS]
+
+[ACTION_ITEMS_SUMMARY]
+<h4>John Doe:</h4>
+<ul>
+<li>Task 1 - Due: 2025-01-15</li>
+<li>Task 2 - Due: 2025-01-20</li>
+</ul>
+[/ACTION_ITEMS_SUMMARY]
+
+[DISCUSSION_POINTS]
+<h4>Topic 1</h4>
+<p>Discussion details...</p>
+[/DISCUSSION_POINTS]
+"""
+        return prompt
+
+    def _parse_ai_response(self, ai_text):
+        """Parse tagged AI response into the four required sections."""
+        import re
+
+        def extract_section(text, section_name):
+            pattern = r'\[' + re.escape(section_name) + r'\](.*?)\[/' + re.escape(section_name) + r'\]'
+            m = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+            return m.group(1).strip() if m else ''
+
+        return {
+            'executive_summary': extract_section(ai_text, 'EXECUTIVE_SUMMARY'),
+            'key_decisions': extract_section(ai_text, 'KEY_DECISIONS'),
+            'action_items_summary': extract_section(ai_text, 'ACTION_ITEMS_SUMMARY'),
+            'discussion_points': extract_section(ai_text, 'DISCUSSION_POINTS')
+        }
\ No newline at end of file
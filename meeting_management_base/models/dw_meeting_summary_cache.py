@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from smartdz import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Bump when the prompt changes, so answers to the old prompt are not served anymore
+SUMMARY_PROMPT_VERSION = 2
+SUMMARY_SECTIONS = ('executive_summary', 'key_decisions', 'action_items_summary', 'discussion_points')
+
+
+class DwMeetingSummaryCache(models.Model):
+    _name = 'dw.meeting.summary.cache'
+    _description = 'Meeting Summary AI Cache'
+    _order = 'last_used_at desc'
+
+    input_hash = fields.Char(string='Input Hash', required=True, index=True, readonly=True)
+    provider = fields.Char(string='Provider', required=True, readonly=True)
+    model = fields.Char(string='Model', required=True, readonly=True)
+    result = fields.Json(string='Result', readonly=True)
+    hit_count = fields.Integer(string='Hits', default=0, readonly=True)
+    last_used_at = fields.Datetime(string='Last Used', default=fields.Datetime.now, readonly=True, index=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(input_hash, provider, model)', 'A cached summary already exists for this input.'),
+    ]
+
+    @api.model
+    def _hash_input(self, meeting_data):
+        """SHA-256 of the canonical JSON of the prompt input: key order and formatting do not matter"""
+        canonical = json.dumps([SUMMARY_PROMPT_VERSION, meeting_data], sort_keys=True, separators=(',', ':'),
+                               ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @api.model
+    def _lookup(self, input_hash, chain):
+        """Cached result for the first provider/model of ``chain`` having one"""
+        if not input_hash:
+            return None
+        entries = self.search([('input_hash', '=', input_hash)])
+        for provider, config in chain:
+            entry = entries.filtered(lambda e: e.provider == provider and e.model == config.get('model'))[:1]
+            if entry:
+                entry.write({'hit_count': entry.hit_count + 1, 'last_used_at': fields.Datetime.now()})
+                return dict(entry.result, success=True, provider=entry.provider, model=entry.model, cached=True)
+        return None
+
+    @api.model
+    def _store(self, input_hash, result):
+        # mock answers are kept out, a load test must reach the provider every time
+        if not input_hash or not result.get('provider') or not result.get('model') or result['provider'] == 'mock':
+            return
+        values = {
+            'result': {key: result.get(key) for key in SUMMARY_SECTIONS + ('model_used',)},
+            'last_used_at': fields.Datetime.now(),
+        }
+        entry = self.search([('input_hash', '=', input_hash), ('provider', '=', result['provider']),
+                             ('model', '=', result['model'])], limit=1)
+        if entry:
+            entry.write(values)
+        else:
+            self.create(dict(values, input_hash=input_hash, provider=result['provider'], model=result['model']))
+
+    @api.autovacuum
+    def _gc_unused_entries(self):
+        """Evict entries not used for meeting_management_base.summary_cache_days days (90 by default)"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'meeting_management_base.summary_cache_days', 90))
+        self.search([('last_used_at', '<', fields.Datetime.now() - timedelta(days=days))]).unlink()
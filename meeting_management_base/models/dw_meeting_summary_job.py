@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+
+from smartdz import models, fields, api, _, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+# Jobs run, and provider calls in flight, at the same time in one cron worker, overridden
+# by the meeting_management_base.ai_summary_workers parameter
+SUMMARY_JOB_WORKERS = 4
+# Running jobs are marked alive at least this often while their worker waits on the providers
+SUMMARY_JOB_HEARTBEAT_SECONDS = 60
+# Running jobs not marked alive for this long belong to a dead worker and are queued again
+SUMMARY_JOB_STALE_MINUTES = 5
+# Nightly batch defaults, each overridden by the meeting_management_base.ai_batch_* parameter
+BATCH_START_HOUR = 1
+BATCH_END_HOUR = 6
+BATCH_CONCURRENCY = 2
+BATCH_RATE_PER_MINUTE = 10
+BATCH_MAX_MEETINGS = 200
+BATCH_MAX_ATTEMPTS = 3
+# Meetings queued per transaction, the checkpoint is committed after each of them
+BATCH_ENQUEUE_SIZE = 50
+
+
+class DwMeetingSummaryJob(models.Model):
+    _name = 'dw.meeting.summary.job'
+    _description = 'Meeting Summary Generation Job'
+    _order = 'id desc'
+
+    meeting_id = fields.Many2one('dw.meeting', string='Meeting', required=True, ondelete='cascade', index=True)
+    user_id = fields.Many2one('res.users', string='Requested By', required=True, default=lambda self: self.env.user)
+    origin = fields.Selection([
+        ('manual', 'Manual'),
+        ('batch', 'Nightly Batch'),
+    ], string='Origin', default='manual', required=True, index=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='queued', required=True, index=True)
+    progress = fields.Integer(string='Progress (%)', default=0)
+    summary_id = fields.Many2one('dw.meeting.summary', string='Summary', ondelete='set null')
+    error = fields.Char(string='Error')
+    force = fields.Boolean(string='Bypass Cache')
+    input_hash = fields.Char(string='Input Hash')
+    started_at = fields.Datetime(string='Started On')
+    heartbeat_at = fields.Datetime(string='Last Heartbeat', readonly=True)
+    finished_at = fields.Datetime(string='Finished On')
+
+    @api.model
+    def _enqueue(self, meeting, user=None, force=False):
+        """
+        Queue a generation for ``meeting``, reusing the job already waiting for it.
+
+        Unless ``force`` is set, a summary generated from the same meeting data is
+        returned as a finished job, and a cached provider answer is stored right away.
+        """
+        user = user or self.env.user
+        AI = self.env['dw.meeting.summary.ai']
+        chain = AI._get_provider_chain()[0]
+        # the result depends on the data as planned for the token budget, not on the raw data
+        meeting_data = AI._plan_summary(self.env['dw.meeting.summary'].generate_summary_data(meeting.id),
+                                        AI._get_token_budget(chain))['meeting_data']
+        input_hash = self.env['dw.meeting.summary.cache']._hash_input(meeting_data)
+        if not force:
+            summary = self.env['dw.meeting.summary'].search(
+                [('meeting_id', '=', meeting.id), ('input_hash', '=', input_hash)], limit=1)
+            if not summary:
+                cached = self.env['dw.meeting.summary.cache']._lookup(input_hash, chain)
+                if cached:
+                    summary = self.env['dw.meeting.summary']._create_from_ai(
+                        meeting.id, meeting_data, cached, user.id, input_hash)
+            if summary:
+                return self.create({
+                    'meeting_id': meeting.id, 'user_id': user.id, 'input_hash': input_hash,
+                    'state': 'done', 'progress': 100, 'summary_id': summary.id,
+                    'started_at': fields.Datetime.now(), 'finished_at': fields.Datetime.now(),
+                })
+
+        job = self.search([('meeting_id', '=', meeting.id), ('state', 'in', ('queued', 'running'))], limit=1)
+        if force and job.state == 'queued' and not job.force:
+            job.force = True
+        if job.origin == 'batch' and job.state == 'queued':
+            # someone is waiting for it now: no more off-peak wait, and the progress goes to them
+            job.write({'origin': 'manual', 'user_id': user.id})
+            self.env.ref('meeting_management_base.ir_cron_meeting_summary_jobs')._trigger()
+        elif not job:
+            job = self.create({'meeting_id': meeting.id, 'user_id': user.id, 'force': force})
+            self.env.ref('meeting_management_base.ir_cron_meeting_summary_jobs')._trigger()
+        return job
+
+    def get_status(self):
+        self.ensure_one()
+        return self._status_payload()
+
+    def _status_payload(self):
+        return {
+            'job_id': self.id,
+            'meeting_id': self.meeting_id.id,
+            'state': self.state,
+            'progress': self.progress,
+            'summary_id': self.summary_id.id,
+            'error': self.error or False,
+        }
+
+    def _notify(self):
+        for job in self:
+            self.env['bus.bus']._sendone(job.user_id.partner_id, 'dw.meeting.summary/job', job._status_payload())
+
+    def _make_stream_notifier(self):
+        """
+        Callback for the worker threads forwarding partial sections to the requester.
+
+        The threads have no cursor: each update is sent from a short-lived cursor of its
+        own, committed right away so the browser gets it while the generation goes on.
+        The update also marks the job alive, unless the cron worker is writing it already.
+        """
+        self.ensure_one()
+        registry = self.pool
+        partner_id = self.user_id.partner_id.id
+        job_id = self.id
+
+        def notify(sections):
+            with registry.cursor() as cr:
+                cr.execute("""
+                    UPDATE dw_meeting_summary_job SET heartbeat_at = now() AT TIME ZONE 'UTC'
+                     WHERE id IN (SELECT id FROM dw_meeting_summary_job WHERE id = %s FOR UPDATE SKIP LOCKED)
+                """, [job_id])
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['bus.bus']._sendone(env['res.partner'].browse(partner_id), 'dw.meeting.summary/chunk', {
+                    'job_id': job_id,
+                    'sections': sections,
+                })
+        return notify
+
+    def _set_state(self, vals):
+        """Write, notify and commit, so progress is visible while the batch goes on"""
+        self.write(dict(vals, heartbeat_at=fields.Datetime.now()))
+        self._notify()
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+
+    def _heartbeat(self):
+        """Mark running jobs alive, only the jobs whose heartbeat stopped are queued again"""
+        self.write({'heartbeat_at': fields.Datetime.now()})
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+
+    @api.model
+    def _get_batch_param(self, key, default):
+        return int(self.env['ir.config_parameter'].sudo().get_param(f'meeting_management_base.ai_batch_{key}', default))
+
+    @api.model
+    def _in_batch_window(self):
+        """Whether the current server (UTC) hour is in the off-peak window of the nightly batch"""
+        start = self._get_batch_param('start_hour', BATCH_START_HOUR)
+        end = self._get_batch_param('end_hour', BATCH_END_HOUR)
+        hour = fields.Datetime.now().hour
+        return start <= hour < end if start <= end else (hour >= start or hour < end)
+
+    @api.model
+    def _claim(self, limit):
+        """
+        Lock queued jobs for this worker; jobs locked by another cron run are skipped.
+
+        Manual jobs come first. Batch jobs only run in the off-peak window, with at most
+        ``ai_batch_concurrency`` of them running at the same time across the workers.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM dw_meeting_summary_job
+             WHERE state = 'queued' AND origin = 'manual'
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        if len(ids) < limit and self._in_batch_window():
+            running = self.search_count([('state', '=', 'running'), ('origin', '=', 'batch')])
+            slots = min(limit - len(ids), self._get_batch_param('concurrency', BATCH_CONCURRENCY) - running)
+            if slots > 0:
+                self.env.cr.execute("""
+                    SELECT id FROM dw_meeting_summary_job
+                     WHERE state = 'queued' AND origin = 'batch'
+                  ORDER BY id
+                     LIMIT %s
+                       FOR UPDATE SKIP LOCKED
+                """, [slots])
+                ids += [row[0] for row in self.env.cr.fetchall()]
+        jobs = self.browse(ids)
+        if jobs:
+            jobs._set_state({'state': 'running', 'progress': 10, 'started_at': fields.Datetime.now()})
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Run the queued generations, provider calls go through a bounded thread pool"""
+        self.search([
+            ('state', '=', 'running'),
+            '|', ('heartbeat_at', '=', False),
+            ('heartbeat_at', '<', fields.Datetime.now() - timedelta(minutes=SUMMARY_JOB_STALE_MINUTES)),
+        ]).write({'state': 'queued', 'progress': 0})
+
+        workers = int(self.env['ir.config_parameter'].sudo().get_param(
+            'meeting_management_base.ai_summary_workers', SUMMARY_JOB_WORKERS))
+        jobs = self._claim(workers * 2)
+        if not jobs:
+            return
+
+        AI = self.env['dw.meeting.summary.ai']
+        # the map chunks and hedges of the jobs start threads of their own, the calls share this bound
+        AI._set_call_limit(workers)
+        Summary = self.env['dw.meeting.summary']
+        Cache = self.env['dw.meeting.summary.cache']
+        # everything touching the database is read here, the threads only talk to the providers
+        prepared = {}
+        for job in jobs:
+            try:
+                meeting_data = Summary.generate_summary_data(job.meeting_id.id)
+                chain, hedge_delay = AI._get_provider_chain()
+                plan = AI._plan_summary(meeting_data, AI._get_token_budget(chain))
+                meeting_data = plan['meeting_data']
+                job.input_hash = Cache._hash_input(meeting_data)
+                cached = not job.force and Cache._lookup(job.input_hash, chain)
+                if cached:
+                    job._finish(meeting_data, cached)
+                    continue
+                if job.origin == 'batch':
+                    # nobody waits for these: no hedged duplicate calls, and a per-provider rate
+                    chain, hedge_delay = job._get_batch_chain(chain), 0
+                prepared[job] = (meeting_data, chain, hedge_delay, plan)
+            except Exception as e:
+                _logger.exception("Failed to prepare summary job %s", job.id)
+                job._set_state({'state': 'failed', 'error': str(e)[:255], 'finished_at': fields.Datetime.now()})
+
+        if prepared:
+            jobs.filtered(lambda j: j in prepared)._set_state({'progress': 30})
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dw_summary') as executor:
+                futures = {
+                    executor.submit(AI._execute_plan, chain, plan, hedge_delay,
+                                    job._make_stream_notifier() if job.origin == 'manual' else None): job
+                    for job, (meeting_data, chain, hedge_delay, plan) in prepared.items()
+                }
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=SUMMARY_JOB_HEARTBEAT_SECONDS,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = futures[future]
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = {'success': False, 'error': str(e)}
+                        job._finish(prepared[job][0], result)
+                    if pending:
+                        self.browse([futures[future].id for future in pending])._heartbeat()
+
+        self.env.ref('meeting_management_base.ir_cron_meeting_summary_jobs')._trigger()
+
+    def _get_batch_chain(self, chain):
+        """Copy of ``chain`` whose calls are rate limited, per provider when configured"""
+        config_param = self.env['ir.config_parameter'].sudo()
+        default_rate = self._get_batch_param('rate_per_minute', BATCH_RATE_PER_MINUTE)
+        return [
+            (provider, dict(config, rate_per_minute=int(config_param.get_param(
+                f'meeting_management_base.ai_batch_rate_per_minute_{provider}', default_rate))))
+            for provider, config in chain
+        ]
+
+    @api.model
+    def _cron_enqueue_missing_summaries(self):
+        """
+        Queue a batch job for the done meetings having no summary, in meeting id order.
+
+        The last meeting queued is checkpointed in ``ai_batch_last_meeting_id`` and committed
+        with its jobs, so a run interrupted by a restart resumes where it stopped, and a night
+        reaching ``ai_batch_max_meetings`` is continued the next one. The scan starts over once
+        every meeting was seen. Meetings whose batch generation failed ``BATCH_MAX_ATTEMPTS``
+        times are left to a manual generation.
+        """
+        if not self._in_batch_window():
+            return
+        config_param = self.env['ir.config_parameter'].sudo()
+        checkpoint_key = 'meeting_management_base.ai_batch_last_meeting_id'
+        last_id = int(config_param.get_param(checkpoint_key, 0))
+        remaining = self._get_batch_param('max_meetings', BATCH_MAX_MEETINGS)
+        testing = getattr(threading.current_thread(), 'testing', False)
+
+        while remaining > 0:
+            self.env.cr.execute("""
+                SELECT m.id FROM dw_meeting m
+                 WHERE m.state = 'done' AND m.id > %s
+                   AND NOT EXISTS (SELECT 1 FROM dw_meeting_summary s WHERE s.meeting_id = m.id)
+                   AND NOT EXISTS (SELECT 1 FROM dw_meeting_summary_job j
+                                    WHERE j.meeting_id = m.id AND j.state IN ('queued', 'running'))
+                   AND (SELECT count(*) FROM dw_meeting_summary_job j
+                         WHERE j.meeting_id = m.id AND j.origin = 'batch' AND j.state = 'failed') < %s
+              ORDER BY m.id
+                 LIMIT %s
+            """, [last_id, BATCH_MAX_ATTEMPTS, min(BATCH_ENQUEUE_SIZE, remaining)])
+            meeting_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not meeting_ids:
+                last_id = 0
+                config_param.set_param(checkpoint_key, last_id)
+                break
+            self.create([
+                {'meeting_id': meeting_id, 'user_id': SUPERUSER_ID, 'origin': 'batch'}
+                for meeting_id in meeting_ids
+            ])
+            last_id = meeting_ids[-1]
+            config_param.set_param(checkpoint_key, last_id)
+            remaining -= len(meeting_ids)
+            if not testing:
+                self.env.cr.commit()
+            _logger.info("Queued %s nightly summary job(s), up to meeting %s", len(meeting_ids), last_id)
+
+        self.env.ref('meeting_management_base.ir_cron_meeting_summary_jobs')._trigger()
+
+    def _finish(self, meeting_data, result):
+        self.ensure_one()
+        if not result.get('success'):
+            self._set_state({
+                'state': 'failed',
+                'error': (result.get('error') or _('AI generation failed'))[:255],
+                'finished_at': fields.Datetime.now(),
+            })
+            return
+        if not result.get('cached'):
+            self.env['dw.meeting.summary.cache']._store(self.input_hash, result)
+        summary = self.env['dw.meeting.summary']._create_from_ai(
+            self.meeting_id.id, meeting_data, result, self.user_id.id, self.input_hash)
+        self._set_state({
+            'state': 'done',
+            'progress': 100,
+            'summary_id': summary.id,
+            'finished_at': fields.Datetime.now(),
+        })
@@ -0,0 +1,29 @@
+from smartdz import models, fields
+
+
+class DwMeetingSummaryRecipient(models.Model):
+    """One mailbox a summary was sent to, with the participants it reaches and the delivery outcome"""
+    _name = 'dw.meeting.summary.recipient'
+    _description = 'Meeting Summary Recipient'
+    _order = 'id'
+    _rec_name = 'email'
+
+    summary_id = fields.Many2one('dw.meeting.summary', string='Summary', required=True, ondelete='cascade',
+                                 index=True)
+    participant_ids = fields.Many2many('dw.participant', string='Participants')
+    partner_id = fields.Many2one('res.partner', string='Contact')
+    email = fields.Char(string='Email', required=True)
+    lang = fields.Char(string='Language')
+    mail_id = fields.Many2one('mail.mail', string='Email Message', ondelete='set null', index='btree_not_null')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('exception', 'Delivery Failed'),
+    ], string='Delivery', default='queued', required=True)
+    failure_reason = fields.Char(string='Delivery Failure')
+
+    def _update_delivery_state(self):
+        """Copy the state of the linked emails, called by mail.mail once they were processed"""
+        self.filtered(lambda r: r.mail_id.state == 'sent').write({'state': 'sent', 'failure_reason': False})
+        for recipient in self.filtered(lambda r: r.mail_id.state == 'exception'):
+            recipient.write({'state': 'exception', 'failure_reason': recipient.mail_id.failure_reason})
@@ -7,3 +7,4 @@ class DwMeetingType(models.Model):
     name = fields.Char(string='Name')
 
     description = fields.Text(string='Description')
+    reminder_offset_ids = fields.One2many('dw.meeting.reminder.offset', 'meeting_type_id', string='Reminders')
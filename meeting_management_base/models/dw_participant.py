@@ -2,6 +2,44 @@ from smartdz import models, fields, api
 from smartdz.exceptions import ValidationError
 import secrets
 import hashlib
+import hmac
+import base64
+import logging
+import time
+from datetime import timedelta, timezone
+from collections import Counter, defaultdict
+
+_logger = logging.getLogger(__name__)
+
+# Lifetime of an RSVP link when the meeting has no end time
+RSVP_DEFAULT_VALIDITY_DAYS = 30
+
+
+def _rsvp_signature(secret, participant_id, meeting_id, expiry):
+    message = f"rsvp:{participant_id}:{meeting_id}:{expiry}".encode()
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def sign_rsvp_token(secret, participant_id, meeting_id, expiry):
+    """Build a self-verifying RSVP token ``<participant>.<meeting>.<expiry>.<signature>``"""
+    return f"{participant_id}.{meeting_id}.{expiry}.{_rsvp_signature(secret, participant_id, meeting_id, expiry)}"
+
+
+def verify_rsvp_token(secret, token):
+    """Return ``(participant_id, meeting_id)`` for a valid, unexpired token, else ``None``.
+
+    Only uses the token and the secret, so forged or expired links are rejected
+    without any database access.
+    """
+    parts = (token or '').split('.')
+    if len(parts) != 4 or not all(part.isdigit() for part in parts[:3]):
+        return None
+    participant_id, meeting_id, expiry = (int(part) for part in parts[:3])
+    expected = _rsvp_signature(secret, participant_id, meeting_id, expiry)
+    if not hmac.compare_digest(expected, parts[3]) or expiry < time.time():
+        return None
+    return participant_id, meeting_id
 
 
 class DwParticipant(models.Model):
@@ -18,7 +56,7 @@ class DwParticipant(models.Model):
     partner_id = fields.Many2one('res.partner', string='Partner')
     employee_id = fields.Many2one('hr.employee', string='Partner')
     meeting_planification_id = fields.Many2one('dw.planification.meeting', string='Meeting')
-    meeting_id = fields.Many2one('dw.meeting', string='Meeting')
+    meeting_id = fields.Many2one('dw.meeting', string='Meeting', index=True)
     role_id = fields.Many2one('dw.participant.role', string='Rôles')
     attachments = fields.Binary(string='Attachments')
     access_token = fields.Char(string='Access Token', copy=False, readonly=True)
@@ -32,6 +70,20 @@ class DwParticipant(models.Model):
     is_pv = fields.Boolean(string="Rédacteur PV", store=True, readonly=False)
     user_id = fields.Many2one('res.users', string='User', compute='_compute_user_id', store=True, readonly=True)
 
+    # invitation delivery, updated by the mail queue once the email is processed
+    invitation_mail_id = fields.Many2one('mail.mail', string='Invitation Email', readonly=True, copy=False,
+                                         ondelete='set null', index='btree_not_null')
+    invitation_delivery_state = fields.Selection([
+        ('none', 'Not Sent'),
+        ('no_email', 'No Email'),
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('exception', 'Delivery Failed'),
+    ], string='Invitation Delivery', default='none', readonly=True, copy=False)
+    invitation_failure_reason = fields.Char(string='Delivery Failure', readonly=True, copy=False)
+    rsvp_accept_url = fields.Char(string='Accept Link', compute='_compute_rsvp_urls')
+    rsvp_decline_url = fields.Char(string='Decline Link', compute='_compute_rsvp_urls')
+
     @api.depends('role_id')
     def _compute_is_host(self):
         for rec in self:
@@ -48,16 +100,173 @@ class DwParticipant(models.Model):
             else:
                 rec.user_id = False
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        participants = super().create(vals_list)
+        participants._update_rsvp_counters(1)
+        return participants
+
+    def write(self, vals):
+        rsvp_changed = 'invitation_status' in vals or 'meeting_planification_id' in vals
+        if rsvp_changed:
+            self._update_rsvp_counters(-1)
+        result = super().write(vals)
+        if rsvp_changed:
+            self._update_rsvp_counters(1)
+        return result
+
+    def unlink(self):
+        self._update_rsvp_counters(-1)
+        return super().unlink()
+
+    def _update_rsvp_counters(self, sign):
+        """Add (sign=1) or remove (sign=-1) the participants from their planification RSVP counters"""
+        deltas = defaultdict(Counter)
+        for participant in self:
+            if participant.meeting_planification_id and participant.invitation_status:
+                deltas[participant.meeting_planification_id.id][participant.invitation_status] += sign
+        self.env['dw.planification.meeting'].sudo()._apply_rsvp_deltas(deltas)
+
+    _sql_constraints = [
+        ('access_token_unique', 'unique(access_token)', 'The participant access token must be unique.'),
+    ]
+
     def _generate_access_token(self):
-        """Generate a secure access token for the participant"""
-        for record in self:
-            if not record.access_token:
-                # Create a unique token based on participant ID and secret
-                secret = self.env['ir.config_parameter'].sudo().get_param('database.secret')
-                token_string = f"{record.id}-{record.meeting_planification_id.id}-{secret}"
-                record.access_token = hashlib.sha256(token_string.encode()).hexdigest()
+        """Generate the secure access tokens of the whole recordset in a single UPDATE"""
+        to_generate = self.filtered(lambda p: not p.access_token)
+        if not to_generate:
+            return True
+
+        # HMAC of the participant and its planification, keyed with the database secret
+        secret = self.env['ir.config_parameter'].sudo().get_param('database.secret').encode()
+        tokens = {
+            participant.id: hmac.new(
+                secret, f"{participant.id}-{participant.meeting_planification_id.id}".encode(), hashlib.sha256,
+            ).hexdigest()
+            for participant in to_generate
+        }
+
+        self.flush_model(['access_token'])
+        self.env.cr.execute("""
+            UPDATE dw_participant p
+               SET access_token = t.token
+              FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::varchar[]) AS token) t
+             WHERE p.id = t.id
+               AND p.access_token IS NULL
+        """, [list(tokens), list(tokens.values())])
+        to_generate.invalidate_recordset(['access_token'])
         return True
 
+    def _compute_rsvp_urls(self):
+        secret = self.env['ir.config_parameter'].sudo().get_param('database.secret')
+        for participant in self:
+            if not participant.id or not participant.meeting_planification_id:
+                participant.rsvp_accept_url = participant.rsvp_decline_url = False
+                continue
+            token = participant._get_rsvp_token(secret)
+            base_url = participant.get_base_url()
+            participant.rsvp_accept_url = f"{base_url}/meeting/rsvp/{token}/accept"
+            participant.rsvp_decline_url = f"{base_url}/meeting/rsvp/{token}/decline"
+
+    def _get_rsvp_token(self, secret=None):
+        """Signed RSVP token valid until the end of the planified meeting"""
+        self.ensure_one()
+        secret = secret or self.env['ir.config_parameter'].sudo().get_param('database.secret')
+        planification = self.meeting_planification_id
+        expiry_dt = planification.planned_end_time or (fields.Datetime.now() + timedelta(days=RSVP_DEFAULT_VALIDITY_DAYS))
+        expiry = int(expiry_dt.replace(tzinfo=timezone.utc).timestamp())
+        return sign_rsvp_token(secret, self.id, planification.id, expiry)
+
+    def _get_invitation_email(self):
+        """Email address used to reach the participant"""
+        self.ensure_one()
+        return self._resolve_emails()[self.id]
+
+    def _prefetch_contacts(self):
+        """Load partners, employees and their users for the whole recordset in a few batched reads"""
+        self.fetch(['partner_id', 'employee_id'])
+        self.partner_id.fetch(['email'])
+        self.employee_id.fetch(['user_id', 'work_email'])
+        self.employee_id.user_id.fetch(['partner_id'])
+
+    def _resolve_partners(self):
+        """Partner reaching each participant: its own partner, else the partner of the employee's user
+
+        :return: {participant_id: res.partner (possibly empty)}
+        """
+        self._prefetch_contacts()
+        return {
+            participant.id: participant.partner_id or participant.employee_id.user_id.partner_id
+            for participant in self
+        }
+
+    def _resolve_emails(self):
+        """Email address reaching each participant
+
+        :return: {participant_id: email or False}
+        """
+        self._prefetch_contacts()
+        return {
+            participant.id: participant.partner_id.email or participant.employee_id.work_email or False
+            for participant in self
+        }
+
+    def _queue_invitations(self):
+        """Render the invitation for all participants at once and queue it in the mail queue.
+
+        Emails are created as ``mail.mail`` records and delivered by the mail queue
+        cron, which reuses one SMTP connection per batch; the delivery outcome is
+        reported back on ``invitation_delivery_state``.
+        """
+        template = self.env.ref('meeting_management_base.email_template_meeting_invitation_secure',
+                                raise_if_not_found=False)
+        if not template:
+            _logger.warning("Email template 'email_template_meeting_invitation_secure' not found!")
+            return self.env['mail.mail']
+
+        emails = self._resolve_emails()
+        to_invite = self.filtered(lambda p: emails[p.id])
+        if self - to_invite:
+            _logger.warning("No email address found for participants %s", (self - to_invite).mapped('name'))
+            (self - to_invite).write({'invitation_delivery_state': 'no_email', 'invitation_failure_reason': False})
+        if not to_invite:
+            return self.env['mail.mail']
+
+        mails = to_invite._create_template_mails(template, emails)
+
+        to_invite.write({'invitation_delivery_state': 'queued', 'invitation_failure_reason': False})
+        for participant, mail in zip(to_invite, mails):
+            participant.invitation_mail_id = mail
+
+        # wake the mail queue up instead of waiting for its next scheduled run
+        self.env.ref('mail.ir_cron_mail_scheduler_action')._trigger()
+        _logger.info("Queued %d meeting invitation(s)", len(mails))
+        return mails
+
+    def _queue_reminders(self):
+        """Render the reminder for all participants at once and queue it in the mail queue"""
+        template = self.env.ref('meeting_management_base.email_template_meeting_reminder', raise_if_not_found=False)
+        if not template:
+            _logger.warning("Email template 'email_template_meeting_reminder' not found!")
+            return self.env['mail.mail']
+
+        emails = self._resolve_emails()
+        to_remind = self.filtered(lambda p: emails[p.id])
+        if not to_remind:
+            return self.env['mail.mail']
+
+        mails = to_remind._create_template_mails(template, emails)
+        self.env.ref('mail.ir_cron_mail_scheduler_action')._trigger()
+        return mails
+
+    def _create_template_mails(self, template, emails):
+        """Render ``template`` once for the whole recordset and create one mail.mail per participant
+
+        :param emails: {participant_id: email_to}
+        """
+        return self.env['mail.mail']._create_from_template(
+            template, [(participant, emails[participant.id], False) for participant in self])
+
     # TODO: this constraint is triggered once the whole record is being created, need to find a way to trigger it before
     @api.constrains('employee_id', 'partner_id', 'meeting_planification_id')
     def _check_unique_participant(self):
@@ -1,10 +1,25 @@
 from smartdz import models, fields, api, _
 from smartdz.exceptions import ValidationError
 from datetime import timedelta, datetime
+import hashlib
 import logging
+import threading
 
 _logger = logging.getLogger(__name__)
 
+# Planifications handled per reminder cron run, the cron re-triggers itself while due rows remain
+REMINDER_BATCH_SIZE = 200
+# Planifications synced with the calendar per cron run, and attempts before a sync is given up
+CALENDAR_SYNC_BATCH_SIZE = 50
+CALENDAR_SYNC_MAX_ATTEMPTS = 5
+
+# invitation status -> stored counter on dw.planification.meeting
+RSVP_COUNTER_FIELDS = {
+    'accepted': 'rsvp_accepted_count',
+    'declined': 'rsvp_declined_count',
+    'pending': 'rsvp_pending_count',
+}
+
 class DwAgenda(models.Model):
     _name = 'dw.agenda'
     _description = 'Agenda'
@@ -14,6 +29,31 @@ class DwAgenda(models.Model):
     meeting_id = fields.Many2one('dw.meeting', string='Meeting')
     session_id = fields.Many2one('dw.meeting.session', string='session')
 
+    def _log_agenda_event(self, operation):
+        """Journal agenda changes made while the meeting is running"""
+        entries = []
+        for item in self:
+            meeting = item.meeting_id or item.session_id.meeting_id
+            if meeting.state == 'in_progress':
+                entries.append((meeting.id, {'operation': operation, 'agenda_id': item.id, 'name': item.name}))
+        if entries:
+            self.env['dw.meeting.event']._log('agenda', entries)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        items = super().create(vals_list)
+        items._log_agenda_event('create')
+        return items
+
+    def write(self, vals):
+        result = super().write(vals)
+        self._log_agenda_event('write')
+        return result
+
+    def unlink(self):
+        self._log_agenda_event('unlink')
+        return super().unlink()
+
 class DwPlanificationMeeting(models.Model):
     _name = 'dw.planification.meeting'
     _description = 'Planification Meeting'
@@ -44,6 +84,11 @@ class DwPlanificationMeeting(models.Model):
     display_camera = fields.Boolean(string='Display the cameras in the meeting', default=False)
     is_current_user_host = fields.Boolean(string="Is Current User Host", compute="_compute_is_current_user_host")
     calendar_event_id = fields.Many2one('calendar.event', string='Calendar Event', readonly=True, copy=False)
+    calendar_fingerprint = fields.Json(string='Calendar Fingerprint', readonly=True, copy=False)
+    calendar_sync_pending = fields.Boolean(string='Calendar Sync Pending', readonly=True, copy=False, index=True)
+    calendar_sync_attempts = fields.Integer(string='Calendar Sync Attempts', readonly=True, copy=False)
+    calendar_sync_error = fields.Char(string='Calendar Sync Error', readonly=True, copy=False)
+    calendar_organizer_id = fields.Many2one('res.users', string='Calendar Organizer', readonly=True, copy=False)
     sync_with_calendar = fields.Boolean(string='Sync with Calendar', default=True)
     has_pv = fields.Boolean(string='PV', default=True)
     has_remote_participants = fields.Boolean(
@@ -52,6 +97,18 @@ class DwPlanificationMeeting(models.Model):
         store=True
     )
 
+    # RSVP counters, maintained incrementally by dw.participant (see _apply_rsvp_deltas)
+    rsvp_accepted_count = fields.Integer(string='Accepted', default=0, readonly=True, copy=False, index=True)
+    rsvp_declined_count = fields.Integer(string='Declined', default=0, readonly=True, copy=False, index=True)
+    rsvp_pending_count = fields.Integer(string='Pending', default=0, readonly=True, copy=False, index=True)
+    rsvp_response_rate = fields.Float(string='Response Rate (%)', default=0.0, readonly=True, copy=False,
+                                      index=True, aggregator='avg', digits=(16, 1))
+
+    # reminders, the cron only reads rows whose next_reminder_at is due
+    last_reminder_at = fields.Datetime(string='Last Reminder', readonly=True, copy=False)
+    next_reminder_at = fields.Datetime(string='Next Reminder', compute='_compute_next_reminder_at', store=True,
+                                       index='btree_not_null', copy=False)
+
     state = fields.Selection([
         ('draft', 'Draft'),
         ('confirmed', 'Confirmed'),
@@ -67,6 +124,130 @@ class DwPlanificationMeeting(models.Model):
         for meeting in self:
             meeting.has_remote_participants = any(meeting.participant_ids.mapped('is_remote'))
 
+    def init(self):
+        # rebuild the counters from the participants, fixes databases installed before they existed
+        self.env.cr.execute("""
+            UPDATE dw_planification_meeting m
+               SET rsvp_accepted_count = c.accepted,
+                   rsvp_declined_count = c.declined,
+                   rsvp_pending_count = c.pending,
+                   rsvp_response_rate = COALESCE(round(100.0 * (c.accepted + c.declined) / NULLIF(c.total, 0), 1), 0)
+              FROM (SELECT m2.id,
+                           count(p.id) FILTER (WHERE p.invitation_status = 'accepted') AS accepted,
+                           count(p.id) FILTER (WHERE p.invitation_status = 'declined') AS declined,
+                           count(p.id) FILTER (WHERE p.invitation_status = 'pending') AS pending,
+                           count(p.invitation_status) AS total
+                      FROM dw_planification_meeting m2
+                 LEFT JOIN dw_participant p ON p.meeting_planification_id = m2.id
+                  GROUP BY m2.id) c
+             WHERE m.id = c.id
+               AND (m.rsvp_accepted_count, m.rsvp_declined_count, m.rsvp_pending_count)
+                   IS DISTINCT FROM (c.accepted::int, c.declined::int, c.pending::int)
+        """)
+
+    @api.model
+    def _apply_rsvp_deltas(self, deltas):
+        """
+        Shift the stored RSVP counters without reading the participants.
+
+        :param deltas: {planification_id: Counter({invitation_status: delta})}
+        """
+        rows = [
+            (planification_id, *(counter.get(status, 0) for status in RSVP_COUNTER_FIELDS))
+            for planification_id, counter in deltas.items()
+            if planification_id and any(counter.values())
+        ]
+        if not rows:
+            return
+        self.flush_model(list(RSVP_COUNTER_FIELDS.values()))
+        # the SET expressions see the old values, so the rate adds the deltas itself
+        self.env.cr.execute("""
+            UPDATE dw_planification_meeting m
+               SET rsvp_accepted_count = m.rsvp_accepted_count + d.accepted,
+                   rsvp_declined_count = m.rsvp_declined_count + d.declined,
+                   rsvp_pending_count = m.rsvp_pending_count + d.pending,
+                   rsvp_response_rate = COALESCE(round(
+                       100.0 * (m.rsvp_accepted_count + d.accepted + m.rsvp_declined_count + d.declined)
+                       / NULLIF(m.rsvp_accepted_count + d.accepted + m.rsvp_declined_count + d.declined
+                                + m.rsvp_pending_count + d.pending, 0), 1), 0)
+              FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS accepted,
+                           unnest(%s::int[]) AS declined, unnest(%s::int[]) AS pending) d
+             WHERE m.id = d.id
+        """, [list(column) for column in zip(*rows)])
+        self.browse(deltas).invalidate_recordset(list(RSVP_COUNTER_FIELDS.values()) + ['rsvp_response_rate'])
+
+    @api.depends('state', 'planned_start_datetime', 'last_reminder_at',
+                 'meeting_type_id.reminder_offset_ids.minutes_before')
+    def _compute_next_reminder_at(self):
+        for meeting in self:
+            if meeting.state not in ('confirmed', 'planned') or not meeting.planned_start_datetime:
+                meeting.next_reminder_at = False
+                continue
+            # offsets already covered by the last run are skipped, overdue ones collapse into one reminder
+            candidates = [
+                meeting.planned_start_datetime - timedelta(minutes=offset.minutes_before)
+                for offset in meeting.meeting_type_id.reminder_offset_ids
+            ]
+            candidates = [at for at in candidates if not meeting.last_reminder_at or at > meeting.last_reminder_at]
+            meeting.next_reminder_at = min(candidates, default=False)
+
+    def _get_due_reminder_offset(self):
+        """Offset matching next_reminder_at, it decides how the reminder is delivered"""
+        self.ensure_one()
+        minutes = round((self.planned_start_datetime - self.next_reminder_at).total_seconds() / 60)
+        offsets = self.meeting_type_id.reminder_offset_ids
+        return offsets.filtered(lambda o: o.minutes_before == minutes)[:1] or offsets[:1]
+
+    @api.model
+    def _cron_send_reminders(self):
+        """Send the due reminders; only rows with next_reminder_at in the past are read (index range scan)"""
+        now = fields.Datetime.now()
+        # meetings that started without their reminder leave the index instead of piling up in the range
+        self.search([
+            ('next_reminder_at', '<=', now),
+            ('planned_start_datetime', '<=', now),
+        ], limit=REMINDER_BATCH_SIZE).write({'last_reminder_at': now})
+
+        meetings = self.search([
+            ('next_reminder_at', '<=', now),
+            ('planned_start_datetime', '>', now),
+            ('state', 'in', ('confirmed', 'planned')),
+        ], order='next_reminder_at', limit=REMINDER_BATCH_SIZE)
+        if not meetings:
+            return
+
+        by_email = self.env['dw.participant']
+        notifications = []
+        for meeting in meetings:
+            offset = meeting._get_due_reminder_offset()
+            participants = meeting.participant_ids.filtered(lambda p: p.invitation_status != 'declined')
+            if offset.notify_by in ('email', 'both'):
+                by_email |= participants
+            if offset.notify_by in ('notification', 'both'):
+                payload = {
+                    'planification_id': meeting.id,
+                    'name': meeting.name,
+                    'start': fields.Datetime.to_string(meeting.planned_start_datetime),
+                    'room': meeting.room_id.name or False,
+                    'minutes_before': offset.minutes_before,
+                }
+                notifications.extend(
+                    (partner, 'dw.meeting/reminder', payload)
+                    for partner in participants.user_id.partner_id
+                )
+
+        if by_email:
+            by_email._queue_reminders()
+        if notifications:
+            self.env['bus.bus']._sendmany(notifications)
+
+        # recomputes next_reminder_at for the batch
+        meetings.write({'last_reminder_at': now})
+        _logger.info("Sent reminders for %d planification(s)", len(meetings))
+
+        if len(meetings) == REMINDER_BATCH_SIZE:
+            self.env.ref('meeting_management_base.ir_cron_meeting_reminders')._trigger()
+
     def _compute_is_current_user_host(self):
         for rec in self:
             user = self.env.user
@@ -137,12 +318,9 @@ class DwPlanificationMeeting(models.Model):
 
     def action_plan(self):
         for rec in self:
+            # the calendar event is created after commit, see _schedule_calendar_sync
             rec.state = 'planned'
 
-            # Créer l'événement calendrier
-            if rec.sync_with_calendar and not rec.calendar_event_id:
-                rec._create_calendar_event()
-
             # Create room reservation
             if rec.room_id:
                 self.env['dw.reservations'].create({
@@ -163,41 +341,11 @@ class DwPlanificationMeeting(models.Model):
                     'meeting_plannification_id': rec.id,
                 })
 
-            # Generate access tokens for all participants
-            for participant in rec.participant_ids:
-                if not participant.access_token:
-                    participant._generate_access_token()
-
-            # Get the secure email template
-            template = self.env.ref('meeting_management_base.email_template_meeting_invitation_secure', raise_if_not_found=False)
-
-            if template:
-                # Send individual email to each participant
-                for participant in rec.participant_ids:
-                    participant_email = None
-                    if participant.partner_id and participant.partner_id.email:
-                        participant_email = participant.partner_id.email
-                    elif participant.employee_id and participant.employee_id.work_email:
-                        participant_email = participant.employee_id.work_email
-
-                    if participant_email:
-                        try:
-                            template.send_mail(
-                                participant.id,  # Send to participant record
-                                force_send=True,
-                                email_values={
-                                    'email_to': participant_email,
-                                    'recipient_ids': []  # Clear default recipients
-                                }
-                            )
-                            _logger.info(f"Invitation sent to {participant.name} ({participant_email})")
-                        except Exception as e:
-                            _logger.error(f"Failed to send invitation to {participant.name}: {str(e)}")
-                    else:
-                        _logger.warning(f"No email address found for participant {participant.name}")
-            else:
-                _logger.warning("Email template 'email_template_meeting_invitation_secure' not found!")
+        # Generate access tokens for all participants in one statement
+        self.participant_ids._generate_access_token()
 
+        # Render all invitations at once and leave the delivery to the mail queue
+        self.participant_ids._queue_invitations()
 
                 # 'name': rec.name,
                 # 'objet': rec.objet,
@@ -422,22 +570,76 @@ class DwPlanificationMeeting(models.Model):
         result = super().write(vals)
 
         # Si on passe à l'état planned ou confirmed, créer l'événement
-        if 'state' in vals and vals['state'] in ['planned', 'confirmed']:
-            for record in self:
-                if record.sync_with_calendar and not record.calendar_event_id:
-                    record._create_calendar_event()
-
         # Si des champs liés à la date/heure sont modifiés, mettre à jour le calendrier
         calendar_fields = ['name', 'planned_start_datetime', 'duration', 'planned_end_time', 'location_id',
-                           'room_id', 'subject_order', 'participant_ids']
+                           'room_id', 'subject_order', 'participant_ids', 'objet']
 
-        if any(field in vals for field in calendar_fields):
-            for record in self:
-                if record.sync_with_calendar and record.calendar_event_id:
-                    record._update_calendar_event()
+        if vals.get('state') in ['planned', 'confirmed'] or any(field in vals for field in calendar_fields):
+            self._schedule_calendar_sync()
 
         return result
 
+    def _schedule_calendar_sync(self):
+        """
+        Queue the calendar synchronisation of the planifications.
+
+        Requests are collected for the whole transaction and flagged once in a precommit
+        hook, so a record written several times is synced once; the cron is triggered
+        for after the commit and the planning itself never waits on the calendar.
+        """
+        records = self.filtered(lambda r: r.sync_with_calendar and (
+            r.calendar_event_id or r.state in ['planned', 'confirmed']))
+        if not records:
+            return
+        pending = self.env.cr.precommit.data.setdefault('dw.planification.meeting.calendar_sync', set())
+        if not pending:
+            self.env.cr.precommit.add(self._flag_calendar_sync)
+        pending.update(records.ids)
+
+    def _flag_calendar_sync(self):
+        ids = self.env.cr.precommit.data.pop('dw.planification.meeting.calendar_sync', set())
+        records = self.browse(ids).exists()
+        if not records:
+            return
+        records.write({
+            'calendar_sync_pending': True,
+            'calendar_sync_attempts': 0,
+            'calendar_sync_error': False,
+        })
+        # the cron runs as OdooBot, keep the user who planned the meeting as the event organizer
+        if not self.env.su:
+            records.filtered(lambda r: not r.calendar_organizer_id).write({'calendar_organizer_id': self.env.uid})
+        self.env.ref('meeting_management_base.ir_cron_meeting_calendar_sync')._trigger()
+
+    @api.model
+    def _cron_sync_calendar(self):
+        """Create or update the calendar events of the flagged planifications, one savepoint each"""
+        records = self.search([
+            ('calendar_sync_pending', '=', True),
+            ('calendar_sync_attempts', '<', CALENDAR_SYNC_MAX_ATTEMPTS),
+        ], order='write_date', limit=CALENDAR_SYNC_BATCH_SIZE)
+        partners = records._get_calendar_partners_map()
+
+        for record in records:
+            try:
+                with self.env.cr.savepoint():
+                    if record.calendar_event_id:
+                        record._update_calendar_event(partners[record.id])
+                    elif record.sync_with_calendar and record.state in ['planned', 'confirmed']:
+                        record._create_calendar_event(partners[record.id])
+                    record.write({'calendar_sync_pending': False, 'calendar_sync_error': False})
+            except Exception as e:
+                _logger.warning("Calendar sync failed for planification %s: %s", record.id, e)
+                record.write({
+                    'calendar_sync_attempts': record.calendar_sync_attempts + 1,
+                    'calendar_sync_error': str(e)[:255],
+                })
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+
+        if len(records) == CALENDAR_SYNC_BATCH_SIZE:
+            self.env.ref('meeting_management_base.ir_cron_meeting_calendar_sync')._trigger()
+
     def unlink(self):
         """Supprimer l'événement calendrier lors de la suppression"""
         calendar_events = self.mapped('calendar_event_id')
@@ -446,29 +648,27 @@ class DwPlanificationMeeting(models.Model):
             calendar_events.unlink()
         return result
 
-    def _create_calendar_event(self):
-        """Créer un événement dans le calendrier"""
-        self.ensure_one()
+    def _prepare_calendar_values(self, partner_ids=None):
+        """Projection of the planification on its calendar.event, used for creation and diffed on update
 
-        if not self.planned_start_datetime:
-            return
+        :param partner_ids: attendees already resolved by _get_calendar_partners_map
+        """
+        self.ensure_one()
+        if partner_ids is None:
+            partner_ids = self._get_calendar_partners()
 
         # Préparer la description
         description_parts = []
         if self.objet:
             description_parts.append(f"Objet: {self.objet}")
         if self.subject_order:
-            description_parts.append(f"\n\nAgenda:\n{self.subject_order}")
+            agenda = '\n'.join(self.subject_order.mapped('name'))
+            description_parts.append(f"\n\nAgenda:\n{agenda}")
         if self.room_id:
             description_parts.append(f"\n\nSalle: {self.room_id.name}")
         if self.location_id:
             description_parts.append(f"Lieu: {self.location_id.name}")
 
-        description = '\n'.join(description_parts) if description_parts else ''
-
-        # Récupérer les participants
-        partner_ids = self._get_calendar_partners()
-
         # Localisation
         location = ''
         if self.room_id:
@@ -478,24 +678,49 @@ class DwPlanificationMeeting(models.Model):
         elif self.location_id:
             location = self.location_id.name
 
-        # Créer l'événement calendrier
-        calendar_vals = {
+        return {
             'name': self.name or 'Réunion',
             'start': self.planned_start_datetime,
             'stop': self.planned_end_time or self.planned_start_datetime,
             'duration': self.duration,
-            'description': description,
+            'description': '\n'.join(description_parts) if description_parts else '',
             'location': location,
-            'partner_ids': [(6, 0, partner_ids)],
-            'user_id': self.env.user.id,
-            'privacy': 'public',
-            'show_as': 'busy',
-            'active': True,
+            'partner_ids': sorted(set(partner_ids)),
         }
 
+    @api.model
+    def _calendar_fingerprint(self, values):
+        """Hash of each projected field; partners are kept as ids so they can be diffed"""
+        fingerprint = {
+            field: hashlib.sha1(str(value).encode()).hexdigest()
+            for field, value in values.items() if field != 'partner_ids'
+        }
+        fingerprint['partner_ids'] = values['partner_ids']
+        return fingerprint
+
+    def _create_calendar_event(self, partner_ids=None):
+        """Créer un événement dans le calendrier"""
+        self.ensure_one()
+
+        if not self.planned_start_datetime:
+            return
+
+        values = self._prepare_calendar_values(partner_ids)
+        calendar_vals = dict(
+            values,
+            partner_ids=[(6, 0, values['partner_ids'])],
+            user_id=(self.calendar_organizer_id or self.create_uid).id,
+            privacy='public',
+            show_as='busy',
+            active=True,
+        )
+
         try:
             calendar_event = self.env['calendar.event'].create(calendar_vals)
-            self.calendar_event_id = calendar_event.id
+            self.write({
+                'calendar_event_id': calendar_event.id,
+                'calendar_fingerprint': self._calendar_fingerprint(values),
+            })
 
             _logger.info(f"Événement calendrier créé (ID: {calendar_event.id}) pour la planification {self.name}")
 
@@ -509,66 +734,67 @@ class DwPlanificationMeeting(models.Model):
             _logger.error(f"Erreur lors de la création de l'événement calendrier: {str(e)}")
             raise ValidationError(_(f"Failed to create calendar event: {str(e)}"))
 
-    def _update_calendar_event(self):
-        """Mettre à jour l'événement dans le calendrier"""
+    def _update_calendar_event(self, partner_ids=None):
+        """Write the fields of the calendar event whose projection changed since the last sync"""
         self.ensure_one()
 
         if not self.calendar_event_id:
             return
 
-        description_parts = []
-        if self.objet:
-            description_parts.append(f"Objet: {self.objet}")
-        if self.subject_order:
-            description_parts.append(f"\n\nAgenda:\n{self.subject_order}")
-        if self.room_id:
-            description_parts.append(f"\n\nSalle: {self.room_id.name}")
-        if self.location_id:
-            description_parts.append(f"Lieu: {self.location_id.name}")
-
-        description = '\n'.join(description_parts) if description_parts else ''
-
-        partner_ids = self._get_calendar_partners()
-
-        location = ''
-        if self.room_id:
-            location = self.room_id.name
-            if self.location_id:
-                location += f" - {self.location_id.name}"
-        elif self.location_id:
-            location = self.location_id.name
+        values = self._prepare_calendar_values(partner_ids)
+        fingerprint = self._calendar_fingerprint(values)
+        previous = self.calendar_fingerprint or {}
+        if fingerprint == previous:
+            return
 
         update_vals = {
-            'name': self.name or 'Réunion',
-            'start': self.planned_start_datetime,
-            'stop': self.planned_end_time or self.planned_start_datetime,
-            'duration': self.duration,
-            'description': description,
-            'location': location,
-            'partner_ids': [(6, 0, partner_ids)],
+            field: value for field, value in values.items()
+            if field != 'partner_ids' and fingerprint[field] != previous.get(field)
         }
+        # link/unlink only the partners that changed, a (6, 0, ids) would rebuild every attendee
+        new_partners = set(values['partner_ids'])
+        if 'partner_ids' not in previous:
+            update_vals['partner_ids'] = [(6, 0, values['partner_ids'])]
+        elif new_partners != set(previous['partner_ids']):
+            old_partners = set(previous['partner_ids'])
+            update_vals['partner_ids'] = [(4, partner_id) for partner_id in new_partners - old_partners] \
+                + [(3, partner_id) for partner_id in old_partners - new_partners]
 
         try:
-            self.calendar_event_id.write(update_vals)
-            _logger.info(f"Événement calendrier mis à jour (ID: {self.calendar_event_id.id})")
+            if update_vals:
+                self.calendar_event_id.write(update_vals)
+            self.calendar_fingerprint = fingerprint
+            _logger.info(f"Événement calendrier mis à jour (ID: {self.calendar_event_id.id}): {sorted(update_vals)}")
         except Exception as e:
             _logger.error(f"Erreur lors de la mise à jour de l'événement calendrier: {str(e)}")
+            raise
 
     def _get_calendar_partners(self):
         """Récupérer les IDs des partners pour le calendrier"""
-        partner_ids = []
+        self.ensure_one()
+        return self._get_calendar_partners_map()[self.id]
 
-        for participant in self.participant_ids:
-            if participant.partner_id:
-                partner_ids.append(participant.partner_id.id)
-            elif participant.employee_id and participant.employee_id.user_id:
-                partner_ids.append(participant.employee_id.user_id.partner_id.id)
+    def _get_calendar_partners_map(self):
+        """Calendar attendees of every planification, resolved in one pass over all participants
 
-        # Ajouter l'utilisateur créateur s'il n'est pas déjà dans la liste
-        if self.env.user.partner_id.id not in partner_ids:
-            partner_ids.append(self.env.user.partner_id.id)
+        :return: {planification_id: [partner_id]}
+        """
+        participants = self.participant_ids
+        partners = participants._resolve_partners()
 
-        return partner_ids
+        result = {}
+        for meeting in self:
+            partner_ids = []
+            for participant in meeting.participant_ids:
+                partner_id = partners[participant.id].id
+                if partner_id and partner_id not in partner_ids:
+                    partner_ids.append(partner_id)
+            # Ajouter l'organisateur s'il n'est pas déjà dans la liste
+            user_partner_id = (meeting.calendar_organizer_id or meeting.create_uid).partner_id.id
+            if user_partner_id and user_partner_id not in partner_ids:
+                partner_ids.append(user_partner_id)
+            result[meeting.id] = partner_ids
+        return result
 
     def action_view_calendar_event(self):
         """Action pour ouvrir l'événement calendrier"""
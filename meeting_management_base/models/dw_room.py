@@ -1,5 +1,7 @@
-from smartdz import models, fields, api
+from smartdz import models, fields, api, _
+from smartdz.exceptions import AccessError
 from datetime import datetime, timedelta
+import secrets
 import pytz
 from pytz import timezone
 
@@ -23,6 +25,23 @@ class DwRoom(models.Model):
 
     current_reservation_id = fields.Many2one('dw.planification.meeting', string='Current Meeting',
                                              compute='_compute_current_meeting')
+    ics_token = fields.Char(string='Calendar Feed Token', copy=False, readonly=True,
+                            groups='base.group_erp_manager')
+    ics_url = fields.Char(string='Calendar Feed', compute='_compute_ics_url', groups='base.group_erp_manager')
+
+    @api.depends('ics_token')
+    def _compute_ics_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        for room in self:
+            room.ics_url = room.ics_token and f"{base_url}/meeting/ics/room/{room.id}?token={room.ics_token}"
+
+    def action_reset_ics_token(self):
+        """Issue a new feed token, the previous feed URL stops working"""
+        if not self.env.user.has_group('base.group_erp_manager'):
+            raise AccessError(_("Only managers can manage the calendar feed of a room."))
+        for room in self:
+            room.ics_token = secrets.token_urlsafe(32)
+        return True
 
     @api.depends('capacity_number')
     def _compute_capacity(self):
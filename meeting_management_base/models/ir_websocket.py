@@ -0,0 +1,27 @@
+import re
+
+from smartdz import models
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Resolve the live PV channels requested by the session view.
+
+        The client subscribes to ``dw.meeting_pv_<id>``; only meetings readable by the
+        user (participants, through the record rules) are turned into bus channels.
+        """
+        channels = list(channels)
+        meeting_ids = []
+        for channel in list(channels):
+            if isinstance(channel, str):
+                match = re.fullmatch(r'dw\.meeting_pv_(\d+)', channel)
+                if match:
+                    channels.remove(channel)
+                    meeting_ids.append(int(match.group(1)))
+
+        if meeting_ids and self.env.uid:
+            meetings = self.env['dw.meeting'].search([('id', 'in', meeting_ids)])
+            channels.extend((meeting, 'pv') for meeting in meetings)
+        return super()._build_bus_channel_list(channels)
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from smartdz import models, api
+
+
+class MailMail(models.Model):
+    _inherit = 'mail.mail'
+
+    @api.model
+    def _create_from_template(self, template, recipients):
+        """Render ``template`` once per language for all the records and queue one email per recipient
+
+        :param recipients: list of (record, email_to, lang), lang False keeps the rendering language
+        :return: the mail.mail records, in the order of ``recipients``
+        """
+        res_ids = defaultdict(set)
+        for record, _email_to, lang in recipients:
+            res_ids[lang].add(record.id)
+        rendered = {
+            lang: (template.with_context(lang=lang) if lang else template)._generate_template(
+                sorted(ids), ('subject', 'body_html', 'email_from', 'reply_to', 'mail_server_id'),
+            )
+            for lang, ids in res_ids.items()
+        }
+        values = []
+        for record, email_to, lang in recipients:
+            render = rendered[lang][record.id]
+            values.append({
+                'subject': render.get('subject'),
+                'body_html': render.get('body_html'),
+                'email_from': render.get('email_from') or self.env.user.email_formatted,
+                'reply_to': render.get('reply_to'),
+                'mail_server_id': render.get('mail_server_id'),
+                'email_to': email_to,
+                'recipient_ids': [],
+                'model': record._name,
+                'res_id': record.id,
+                'auto_delete': template.auto_delete,
+            })
+        return self.sudo().create(values)
+
+    def _postprocess_sent_message(self, success_pids, *args, **kwargs):
+        """Report the delivery outcome of meeting invitations and summaries before the emails get deleted"""
+        self.env['dw.meeting.summary.recipient'].sudo().search([('mail_id', 'in', self.ids)])._update_delivery_state()
+        participants = self.env['dw.participant'].sudo().search([('invitation_mail_id', 'in', self.ids)])
+        if participants:
+            sent = participants.filtered(lambda p: p.invitation_mail_id.state == 'sent')
+            sent.write({'invitation_delivery_state': 'sent', 'invitation_failure_reason': False})
+            for participant in participants.filtered(lambda p: p.invitation_mail_id.state == 'exception'):
+                participant.write({
+                    'invitation_delivery_state': 'exception',
+                    'invitation_failure_reason': participant.invitation_mail_id.failure_reason,
+                })
+        return super()._postprocess_sent_message(success_pids, *args, **kwargs)
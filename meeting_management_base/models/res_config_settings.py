@@ -44,11 +44,27 @@ class ResConfigSettings(models.TransientModel):
         ('openrouter', 'OpenRouter (FREE - Multiple Models)'),
         ('groq', 'Groq (FREE - Fast)'),
         ('huggingface', 'Hugging Face (FREE)'),
+        ('mock', 'Local Mock (load testing only)'),
     ], string='AI Provider',
         default='gemini',
         config_parameter='meeting_management_base.ai_provider',
         help='Choose which AI provider to use for generating meeting summaries')
 
+    ai_provider_fallback = fields.Boolean(
+        string='Fall Back to Other Providers',
+        config_parameter='meeting_management_base.ai_provider_fallback',
+        help='When the selected provider fails or is unavailable, try the other providers having an API key '
+             '(Gemini, Groq, OpenRouter, Hugging Face)'
+    )
+
+    ai_hedge_delay = fields.Float(
+        string='Hedge After (seconds)',
+        config_parameter='meeting_management_base.ai_hedge_delay',
+        default=0.0,
+        help='If the provider has not answered after this delay, also ask the next provider and keep the '
+             'first valid answer. 0 disables hedging.'
+    )
+
     gemini_api_key = fields.Char(
         string='Google Gemini API Key',
         config_parameter='meeting_management_base.gemini_api_key',
@@ -73,6 +89,76 @@ class ResConfigSettings(models.TransientModel):
         help='Get free at: https://huggingface.co/settings/tokens'
     )
 
+    ai_structured_output = fields.Boolean(
+        string='Structured Output',
+        config_parameter='meeting_management_base.ai_structured_output',
+        help='Ask the providers supporting it (Gemini, Groq, OpenRouter) for a JSON summary checked against a '
+             'schema, instead of tagged free text'
+    )
+
+    ai_batch_start_hour = fields.Integer(
+        string='Nightly Batch Start Hour',
+        config_parameter='meeting_management_base.ai_batch_start_hour',
+        default=1,
+        help='Hour (server time, UTC) from which summaries of done meetings are generated in batch'
+    )
+
+    ai_batch_end_hour = fields.Integer(
+        string='Nightly Batch End Hour',
+        config_parameter='meeting_management_base.ai_batch_end_hour',
+        default=6,
+        help='Hour (server time, UTC) at which the batch generation pauses until the next night'
+    )
+
+    ai_batch_concurrency = fields.Integer(
+        string='Batch Concurrency',
+        config_parameter='meeting_management_base.ai_batch_concurrency',
+        default=2,
+        help='Batch summaries generated at the same time'
+    )
+
+    ai_batch_rate_per_minute = fields.Integer(
+        string='Batch Calls per Minute',
+        config_parameter='meeting_management_base.ai_batch_rate_per_minute',
+        default=10,
+        help='Maximum calls per minute to each AI provider during the batch generation'
+    )
+
+    ai_batch_max_meetings = fields.Integer(
+        string='Batch Meetings per Night',
+        config_parameter='meeting_management_base.ai_batch_max_meetings',
+        default=200,
+        help='Meetings queued per night; the next night continues with the following ones'
+    )
+
+    ai_mock_latency_ms = fields.Integer(
+        string='Mock Latency (ms)',
+        config_parameter='meeting_management_base.ai_mock_latency_ms',
+        default=800,
+        help='Average time the local mock provider takes to answer'
+    )
+
+    ai_mock_jitter_ms = fields.Integer(
+        string='Mock Latency Deviation (ms)',
+        config_parameter='meeting_management_base.ai_mock_jitter_ms',
+        default=200,
+        help='Standard deviation of the mock provider answer time'
+    )
+
+    ai_mock_error_rate = fields.Float(
+        string='Mock Error Rate',
+        config_parameter='meeting_management_base.ai_mock_error_rate',
+        default=0.0,
+        help='Share of the mock provider calls failing, between 0 and 1'
+    )
+
+    ai_mock_response = fields.Char(
+        string='Mock Response',
+        config_parameter='meeting_management_base.ai_mock_response',
+        help='Canned tagged answer of the mock provider, {title} being replaced by the meeting title. '
+             'Empty to answer with a templated summary.'
+    )
+
     @api.model
     def get_values(self):
         """Get the current settings values"""
@@ -0,0 +1,33 @@
+import secrets
+
+from smartdz import models, fields, api, _
+from smartdz.exceptions import AccessError
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    meeting_ics_token = fields.Char(string='Meeting Calendar Token', copy=False, readonly=True,
+                                    index='btree_not_null', groups='base.group_system')
+    meeting_ics_url = fields.Char(string='Meeting Calendar Feed', compute='_compute_meeting_ics_url')
+
+    @property
+    def SELF_READABLE_FIELDS(self):
+        return super().SELF_READABLE_FIELDS + ['meeting_ics_url']
+
+    @api.depends_context('uid')
+    def _compute_meeting_ics_url(self):
+        """The feed URL is a credential: only its owner (and the administrators) get it"""
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        is_admin = self.env.user.has_group('base.group_system')
+        for user in self:
+            token = (user == self.env.user or is_admin) and user.sudo().meeting_ics_token
+            user.meeting_ics_url = token and f"{base_url}/meeting/ics/user/{token}"
+
+    def action_reset_meeting_ics_token(self):
+        """Issue a new feed token, the previous feed URL stops working"""
+        if self != self.env.user and not self.env.user.has_group('base.group_system'):
+            raise AccessError(_("You can only reset your own meeting calendar feed."))
+        for user in self:
+            user.sudo().meeting_ics_token = secrets.token_urlsafe(32)
+        return True
@@ -0,0 +1,36 @@
+/** @odoo-module **/
+import { registry } from "@web/core/registry";
+
+/**
+ * Shows the reminders pushed by dw.planification.meeting._cron_send_reminders
+ * on the user's partner channel.
+ */
+export const meetingReminderService = {
+  dependencies: ["bus_service", "notification", "action"],
+
+  start(env, { bus_service, notification, action }) {
+    bus_service.subscribe("dw.meeting/reminder", (payload) => {
+      const when = payload.minutes_before >= 60
+        ? `${Math.round(payload.minutes_before / 60)} h`
+        : `${payload.minutes_before} min`;
+      const room = payload.room ? ` - ${payload.room}` : "";
+      notification.add(`"${payload.name}" starts in ${when}${room}`, {
+        title: "Meeting Reminder",
+        type: "info",
+        sticky: true,
+        buttons: [{
+          name: "Open",
+          primary: true,
+          onClick: () => action.doAction({
+            type: "ir.actions.act_window",
+            res_model: "dw.planification.meeting",
+            res_id: payload.planification_id,
+            views: [[false, "form"]],
+          }),
+        }],
+      });
+    });
+  },
+};
+
+registry.category("services").add("dw_meeting_reminder", meetingReminderService);
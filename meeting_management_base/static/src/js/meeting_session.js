@@ -20,6 +20,7 @@ export class MeetingSessionView extends Component {
     this.orm = this.env.services.orm;
     this.actionService = this.env.services.action;
     this.notification = this.env.services.notification;
+    this.busService = this.env.services.bus_service;
 
     this.state = useState({
       loading: true,
@@ -74,6 +75,7 @@ export class MeetingSessionView extends Component {
       meetingTypeName: "",
       jitsiRoomId: null,
       pv: "",
+      pvRevision: 0,
     });
 
     this.sessionId = null;
@@ -83,6 +85,24 @@ export class MeetingSessionView extends Component {
     this.startTime = null;
     this._updateTimeout = null;
 
+    // Live PV: text as acknowledged by the server at state.pvRevision
+    this.pvShadow = "";
+    this.pvChannel = null;
+    this.pvClientId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    this._pvTimeout = null;
+    this._pvInFlight = false;
+
+    // Action items: edits are queued and flushed in one sync_actions call
+    this._actionOps = [];
+    this._actionRefs = {};
+    this._actionRefSeq = 0;
+    this._actionSyncTimeout = null;
+    this._actionSyncInFlight = false;
+
+    // Meeting journal: client events are buffered and appended in batches
+    this._eventBuffer = [];
+    this._eventFlushInterval = null;
+
     // Bind methods
     this.goBack = this.goBack.bind(this);
     this.toggleNotes = this.toggleNotes.bind(this);
@@ -103,6 +123,8 @@ export class MeetingSessionView extends Component {
     this.loadPvTemplate = this.loadPvTemplate.bind(this);
     this.startBlankPv = this.startBlankPv.bind(this);
     this.generatePvTemplate = this.generatePvTemplate.bind(this);
+    this.onPvInput = this.onPvInput.bind(this);
+    this.onPvStep = this.onPvStep.bind(this);
 
     onWillStart(async () => {
       const context = this.props.action?.context || {};
@@ -124,10 +146,12 @@ export class MeetingSessionView extends Component {
       await this.loadSessionData();
       await this.loadActions();
       await this.loadAvailableAssignees();
+      this.subscribePv();
     });
 
     onMounted(async () => {
       if (!this.state.error && this.meetingId) {
+        this._eventFlushInterval = setInterval(() => this.flushEvents(), 5000);
         await this.initializeJitsi();
         this.startDurationTimer();
       }
@@ -147,6 +171,41 @@ export class MeetingSessionView extends Component {
       if (this._updateTimeout) {
         clearTimeout(this._updateTimeout);
       }
+      if (this._pvTimeout) {
+        clearTimeout(this._pvTimeout);
+        this.flushPv();
+      }
+      if (this._actionSyncTimeout) {
+        clearTimeout(this._actionSyncTimeout);
+        this.flushActions();
+      }
+      if (this._eventFlushInterval) {
+        clearInterval(this._eventFlushInterval);
+      }
+      this.flushEvents();
+      if (this.pvChannel) {
+        this.busService.unsubscribe("dw_meeting_pv/step", this.onPvStep);
+        this.busService.deleteChannel(this.pvChannel);
+      }
+    });
+  }
+
+  logEvent(type, payload = {}) {
+    this._eventBuffer.push({
+      type,
+      session_id: this.sessionId,
+      payload,
+    });
+  }
+
+  flushEvents() {
+    if (!this._eventBuffer.length || !this.meetingId) {
+      return;
+    }
+    const events = this._eventBuffer;
+    this._eventBuffer = [];
+    this.orm.call("dw.meeting.event", "log_events", [this.meetingId, events]).catch((error) => {
+      console.warn("Failed to log meeting events:", error);
     });
   }
 
@@ -326,14 +385,7 @@ export class MeetingSessionView extends Component {
         this.state.jitsiRoomId = meetings[0].jitsi_room_id;
       }
       if (this.meetingId) {
-        const meetings = await this.orm.read(
-                  "dw.meeting",
-                  [this.meetingId],
-                  ["pv"]
-                );
-        if (meetings && meetings.length > 0) {
-          this.state.pv = meetings[0].pv || "";
-        }
+        await this.loadPv();
       }
 
 
@@ -356,8 +408,10 @@ export class MeetingSessionView extends Component {
         ["name", "assignee", "dead_line", "priority", "status", "meeting_id", "description"]
       );
 
+      // the ref keys the rows and never changes, even once a new action gets its id
       this.state.actions = actions.map(a => ({
         ...a,
+        ref: `db-${a.id}`,
         assignee_id: a.assignee ? (Array.isArray(a.assignee) ? a.assignee[0] : a.assignee) : "",
       }));
     } catch (error) {
@@ -467,6 +521,7 @@ export class MeetingSessionView extends Component {
         is_connected: true,
         join_datetime: new Date().toISOString(),
       });
+      this.logEvent("join");
 
       this.notification.add("Connected to video conference", {
         type: "success",
@@ -508,6 +563,8 @@ export class MeetingSessionView extends Component {
         is_connected: false,
         actual_end_datetime: new Date().toISOString(),
       });
+      this.logEvent("leave");
+      this.flushEvents();
       this.goBack();
     });
 
@@ -618,6 +675,7 @@ export class MeetingSessionView extends Component {
 
   async toggleCamera() {
     this.state.session.display_camera = !this.state.session.display_camera;
+    this.logEvent("camera", { display_camera: this.state.session.display_camera });
 
     await this.orm.write("dw.meeting.session", [this.sessionId], {
         display_camera: this.state.session.display_camera,
@@ -639,15 +697,138 @@ export class MeetingSessionView extends Component {
       });
     }
   }
+    async loadPv() {
+        const pvState = await this.orm.call("dw.meeting", "pv_get_state", [[this.meetingId]]);
+        this.pvShadow = pvState.text || "";
+        this.state.pvRevision = pvState.revision || 0;
+        this.state.pv = this.pvShadow;
+    }
+
+    subscribePv() {
+        if (!this.meetingId || !this.busService) {
+            return;
+        }
+        this.pvChannel = `dw.meeting_pv_${this.meetingId}`;
+        this.busService.addChannel(this.pvChannel);
+        this.busService.subscribe("dw_meeting_pv/step", this.onPvStep);
+    }
+
+    // PV operations are expressed in code points so that they match Python string offsets
+    computePvOp(from, to) {
+        const a = Array.from(from);
+        const b = Array.from(to);
+        const minLength = Math.min(a.length, b.length);
+        let start = 0;
+        while (start < minLength && a[start] === b[start]) {
+            start++;
+        }
+        let end = 0;
+        while (end < minLength - start && a[a.length - 1 - end] === b[b.length - 1 - end]) {
+            end++;
+        }
+        return {
+            pos: start,
+            del: a.length - start - end,
+            ins: b.slice(start, b.length - end).join(""),
+        };
+    }
+
+    applyPvOp(text, op) {
+        const chars = Array.from(text);
+        const pos = Math.min(Math.max(op.pos, 0), chars.length);
+        chars.splice(pos, Math.max(op.del, 0), ...Array.from(op.ins || ""));
+        return chars.join("");
+    }
+
+    onPvInput() {
+        if (!this.state.session.is_pv) {
+            return;
+        }
+        if (this._pvTimeout) {
+            clearTimeout(this._pvTimeout);
+        }
+        this._pvTimeout = setTimeout(() => {
+            this._pvTimeout = null;
+            this.flushPv();
+        }, 300);
+    }
+
+    async flushPv() {
+        if (!this.state.session.is_pv || this._pvInFlight || !this.meetingId) {
+            return;
+        }
+        const text = this.state.pv;
+        if (text === this.pvShadow) {
+            return;
+        }
+        this._pvInFlight = true;
+        try {
+            const op = this.computePvOp(this.pvShadow, text);
+            const result = await this.orm.call("dw.meeting", "pv_push_step", [
+                [this.meetingId],
+                this.state.pvRevision,
+                op,
+                this.pvClientId,
+            ]);
+            if (!result.resync && result.revision === this.state.pvRevision + 1) {
+                this.pvShadow = text;
+                this.state.pvRevision = result.revision;
+            } else {
+                // Another editor got in between: take the server text as the new base
+                const pvState = await this.orm.call("dw.meeting", "pv_get_state", [[this.meetingId]]);
+                this.pvShadow = pvState.text || "";
+                this.state.pvRevision = pvState.revision || 0;
+                if (this.state.pv === text && !result.resync) {
+                    this.state.pv = this.pvShadow;
+                }
+            }
+        } catch (error) {
+            console.error("Failed to push PV changes:", error);
+        } finally {
+            this._pvInFlight = false;
+        }
+        if (this.state.pv !== this.pvShadow) {
+            this.onPvInput();
+        }
+    }
+
+    async onPvStep(payload) {
+        if (!payload || payload.meeting_id !== this.meetingId || payload.client_id === this.pvClientId) {
+            return;
+        }
+        // Local edits not pushed yet are rebased by the server on the next push
+        const hasPendingEdits = this.state.pv !== this.pvShadow;
+
+        if (payload.text !== undefined) {
+            this.pvShadow = payload.text;
+            this.state.pvRevision = payload.revision;
+            if (!hasPendingEdits) {
+                this.state.pv = payload.text;
+            }
+        } else if (payload.revision === this.state.pvRevision + 1) {
+            if (hasPendingEdits) {
+                return;
+            }
+            this.pvShadow = this.applyPvOp(this.pvShadow, payload.op);
+            this.state.pvRevision = payload.revision;
+            this.state.pv = this.pvShadow;
+        } else if (payload.revision > this.state.pvRevision + 1 && !hasPendingEdits) {
+            await this.loadPv();
+        }
+    }
+
     async savePv() {
         try {
           if (!this.meetingId) {
             throw new Error("No meeting ID available");
           }
 
-          await this.orm.write("dw.meeting", [this.meetingId], {
-            pv: this.state.pv,
-          });
+          if (this._pvTimeout) {
+            clearTimeout(this._pvTimeout);
+            this._pvTimeout = null;
+          }
+          await this.flushPv();
+          await this.orm.call("dw.meeting", "pv_save_snapshot", [[this.meetingId]]);
 
           console.log("Saved PV:", this.state.pv);
           this.notification.add("PV saved successfully", {
@@ -665,6 +846,7 @@ export class MeetingSessionView extends Component {
       // Generate PV template with meeting data
       const template = this.generatePvTemplate();
       this.state.pv = template;
+      this.onPvInput();
 
       this.notification.add("PV template loaded", {
         type: "success",
@@ -814,92 +996,114 @@ async startBlankPv() {
       : true;
 
     if (confirmed) {
-        const meetings = await this.orm.read(
-                  "dw.meeting",
-                  [this.meetingId],
-                  ["pv"]
-                );
-        if (meetings && meetings.length > 0) {
-          this.state.pv = meetings[0].pv || "";
-        }
+        await this.loadPv();
     }
 }
 
 
 
-  async addNewAction() {
-    try {
-      const newActionId = await this.orm.create("dw.actions", [{
-        name: "New Action",
-        session_id: this.sessionId,
-        meeting_id: this.meetingId,
-        status: "todo",
-        priority: "medium",
-      }]);
-
-      this.state.actions.push({
-        id: newActionId[0],
-        name: "New Action",
-        assignee_id: "",
-        dead_line: "",
-        priority: "medium",
-        status: "todo",
-        description: "",
-      });
-
-      this.notification.add("Action item created", { type: "success" });
-    } catch (error) {
-      console.error("Failed to create action:", error);
-      this.notification.add("Failed to create action", { type: "danger" });
+  queueActionOp(op) {
+    this._actionOps.push(op);
+    if (this._actionSyncTimeout) {
+      clearTimeout(this._actionSyncTimeout);
     }
+    this._actionSyncTimeout = setTimeout(() => {
+      this._actionSyncTimeout = null;
+      this.flushActions();
+    }, 800);
   }
 
-  async updateAction(action) {
-    if (!action.id) return;
+  actionKey(action) {
+    const id = action.id || this._actionRefs[action.ref];
+    return id ? { id } : { ref: action.ref };
+  }
 
+  async flushActions() {
+    if (this._actionSyncInFlight || !this._actionOps.length) {
+      return;
+    }
+    // Resolve refs created by a previous flush before sending
+    const ops = this._actionOps.map((op) =>
+      op.ref && this._actionRefs[op.ref] && op.op !== "create"
+        ? { op: op.op, id: this._actionRefs[op.ref], values: op.values }
+        : op
+    );
+    this._actionOps = [];
+    this._actionSyncInFlight = true;
     try {
-      const updateData = {
-        name: action.name,
-        status: action.status,
-        priority: action.priority,
-      };
-
-      if (action.assignee_id) {
-        updateData.assignee = action.assignee_id;
-      }
-      if (action.dead_line) {
-        updateData.dead_line = action.dead_line;
+      const result = await this.orm.call("dw.actions", "sync_actions", [this.sessionId, ops]);
+      Object.assign(this._actionRefs, result.created);
+      for (const action of this.state.actions) {
+        if (!action.id && result.created[action.ref]) {
+          action.id = result.created[action.ref];
+        }
       }
-
-      await this.orm.write("dw.actions", [action.id], updateData);
-
-      if (this._updateTimeout) clearTimeout(this._updateTimeout);
-      this._updateTimeout = setTimeout(() => {
+      if (result.updated.length) {
         this.notification.add("Action updated", {
           type: "success",
           timeout: 1000
         });
-      }, 500);
+      }
     } catch (error) {
-      console.error("Failed to update action:", error);
-      this.notification.add("Failed to update action", { type: "danger" });
+      console.error("Failed to sync actions:", error);
+      this.notification.add("Failed to save action items", { type: "danger" });
+      await this.loadActions();
+    } finally {
+      this._actionSyncInFlight = false;
+    }
+    if (this._actionOps.length && !this._actionSyncTimeout) {
+      this.flushActions();
+    }
+  }
+
+  addNewAction() {
+    const ref = `new-${++this._actionRefSeq}`;
+    this.state.actions.push({
+      id: null,
+      ref,
+      name: "New Action",
+      assignee_id: "",
+      dead_line: "",
+      priority: "medium",
+      status: "todo",
+      description: "",
+    });
+    this.queueActionOp({
+      op: "create",
+      ref,
+      values: { name: "New Action", status: "todo", priority: "medium" },
+    });
+  }
+
+  updateAction(action) {
+    if (!action.id && !action.ref) return;
+
+    const updateData = {
+      name: action.name,
+      status: action.status,
+      priority: action.priority,
+    };
+
+    if (action.assignee_id) {
+      updateData.assignee = Number(action.assignee_id);
+    }
+    if (action.dead_line) {
+      updateData.dead_line = action.dead_line;
     }
+
+    this.queueActionOp({ op: "update", ...this.actionKey(action), values: updateData });
   }
 
-  async deleteAction(action) {
-    if (!action.id) return;
+  deleteAction(action) {
+    if (!action.id && !action.ref) return;
 
     const confirmed = confirm("Delete this action item?");
     if (!confirmed) return;
 
-    try {
-      await this.orm.unlink("dw.actions", [action.id]);
-      this.state.actions = this.state.actions.filter(a => a.id !== action.id);
-      this.notification.add("Action deleted", { type: "success" });
-    } catch (error) {
-      console.error("Failed to delete action:", error);
-      this.notification.add("Failed to delete action", { type: "danger" });
-    }
+    this.queueActionOp({ op: "delete", ...this.actionKey(action) });
+    this.state.actions = this.state.actions.filter(a =>
+      action.id ? a.id !== action.id : a.ref !== action.ref
+    );
   }
 
   async leaveMeeting() {
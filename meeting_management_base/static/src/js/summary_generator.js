@@ -1,8 +1,17 @@
 /** @odoo-module **/
 import { registry } from "@web/core/registry";
-import { Component, useState } from "@smartdz/owl";
+import { Component, useState, onWillUnmount } from "@smartdz/owl";
 import { useService } from "@web/core/utils/hooks";
 
+const SECTION_LABELS = [
+  ["executive_summary", "Executive Summary"],
+  ["key_decisions", "Key Decisions"],
+  ["action_items_summary", "Action Items"],
+  ["discussion_points", "Discussion Points"],
+];
+// the bus pushes the progress; polling only catches up when a notification was missed
+const STATUS_POLL_INTERVAL = 10000;
+
 export class MeetingSummaryGenerator extends Component {
   static template = "meeting_management_base.MeetingSummaryGenerator";
   static props = {
@@ -21,12 +30,64 @@ export class MeetingSummaryGenerator extends Component {
       error: null,
       meetingId: this.props.action?.params?.meeting_id,
       meetingName: this.props.action?.params?.meeting_name,
+      jobId: null,
+      progress: 0,
+      partial: {},
+    });
+
+    this.busService = this.env.services.bus_service;
+    this.onJobNotification = (payload) => this.onJobUpdate(payload);
+    this.busService.subscribe("dw.meeting.summary/job", this.onJobNotification);
+    this.onChunkNotification = (payload) => this.onJobChunk(payload);
+    this.busService.subscribe("dw.meeting.summary/chunk", this.onChunkNotification);
+    // notifications sent while the websocket was down are lost, ask for the status instead
+    this.onBusReconnect = () => this.pollStatus();
+    this.busService.addEventListener("reconnect", this.onBusReconnect);
+    onWillUnmount(() => {
+      this.busService.unsubscribe("dw.meeting.summary/job", this.onJobNotification);
+      this.busService.unsubscribe("dw.meeting.summary/chunk", this.onChunkNotification);
+      this.busService.removeEventListener("reconnect", this.onBusReconnect);
+      this.stopPolling();
     });
   }
 
+  startPolling() {
+    this.stopPolling();
+    this._statusPollInterval = setInterval(() => this.pollStatus(), STATUS_POLL_INTERVAL);
+  }
+
+  stopPolling() {
+    clearInterval(this._statusPollInterval);
+    this._statusPollInterval = null;
+  }
+
+  async pollStatus() {
+    if (!this.state.generating || !this.state.jobId) {
+      return;
+    }
+    try {
+      const payload = await this.orm.call("dw.meeting.summary.job", "get_status", [[this.state.jobId]]);
+      this.onJobUpdate(payload);
+    } catch (error) {
+      // the next tick or bus message will catch up
+      console.warn("Failed to fetch the summary job status:", error);
+    }
+  }
+
+  get partialSections() {
+    // the sections are HTML still being written, only their text is previewed
+    return SECTION_LABELS.filter(([key]) => this.state.partial[key]).map(([key, label]) => ({
+      key,
+      label,
+      text: this.state.partial[key].replace(/<[^>]*>?/g, " ").replace(/\s+/g, " ").trim(),
+    }));
+  }
+
   async generateSummary() {
     this.state.generating = true;
     this.state.error = null;
+    this.state.progress = 0;
+    this.state.partial = {};
 
     try {
       const response = await fetch("/meeting/generate_summary", {
@@ -39,6 +100,7 @@ export class MeetingSummaryGenerator extends Component {
           method: "call",
           params: {
             meeting_id: this.state.meetingId,
+            force: Boolean(this.props.action?.params?.force),
           },
         }),
       });
@@ -49,31 +111,65 @@ export class MeetingSummaryGenerator extends Component {
         throw new Error(data.error?.message || data.result?.error || "Failed to generate summary");
       }
 
-      this.state.summary = data.result.summary_data;
+      // the generation runs in the background, its progress arrives on the bus
+      this.state.jobId = data.result.job_id;
+      this.startPolling();
+      this.onJobUpdate(data.result);
+    } catch (error) {
+      this.onJobFailed(error.message);
+    }
+  }
 
-      this.notification.add("Summary generated successfully! Opening summary form...", {
-        type: "success",
-      });
+  onJobUpdate(payload) {
+    if (!this.state.generating || payload.job_id !== this.state.jobId) {
+      return;
+    }
+    this.state.progress = payload.progress;
+    if (payload.state === "done") {
+      this.onJobDone(payload);
+    } else if (payload.state === "failed") {
+      this.onJobFailed(payload.error || "Failed to generate summary");
+    }
+  }
 
-      // Open the summary form
-      setTimeout(() => {
-        this.action.doAction({
-          type: "ir.actions.act_window",
-          res_model: "dw.meeting.summary",
-          res_id: data.result.summary_id,
-          views: [[false, "form"]],
-          target: "current",
-        });
-      }, 1000);
-    } catch (error) {
-      console.error("Failed to generate summary:", error);
-      this.state.error = error.message;
-      this.notification.add("Failed to generate summary: " + error.message, {
-        type: "danger",
-      });
-    } finally {
-      this.state.generating = false;
+  onJobChunk(payload) {
+    if (!this.state.generating || payload.job_id !== this.state.jobId) {
+      return;
     }
+    this.state.partial = payload.sections;
+  }
+
+  onJobDone(payload) {
+    this.stopPolling();
+    this.state.generating = false;
+    this.state.jobId = null;
+    this.state.summary = { id: payload.summary_id };
+
+    this.notification.add("Summary generated successfully! Opening summary form...", {
+      type: "success",
+    });
+
+    // Open the summary form
+    setTimeout(() => {
+      this.action.doAction({
+        type: "ir.actions.act_window",
+        res_model: "dw.meeting.summary",
+        res_id: payload.summary_id,
+        views: [[false, "form"]],
+        target: "current",
+      });
+    }, 1000);
+  }
+
+  onJobFailed(message) {
+    console.error("Failed to generate summary:", message);
+    this.stopPolling();
+    this.state.generating = false;
+    this.state.jobId = null;
+    this.state.error = message;
+    this.notification.add("Failed to generate summary: " + message, {
+      type: "danger",
+    });
   }
 
   cancel() {
@@ -0,0 +1 @@
+from . import ai_http
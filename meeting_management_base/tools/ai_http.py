@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Shared HTTP client of the AI providers.
+
+One ``requests.Session`` per worker process keeps the TCP/TLS connections to the
+providers alive between summaries. Calls are retried on 429/5xx and connection
+errors with jittered exponential backoff, and their latency is recorded per provider.
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def get_session():
+    """Session of the current process, recreated after a fork so sockets are never shared"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def _backoff(attempt, response=None):
+    """Full-jitter exponential delay, or the provider's Retry-After when it sends one"""
+    retry_after = response is not None and response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _record(provider, latency_ms, status, retries):
+    with _metrics_lock:
+        metrics = _metrics.setdefault(provider, {
+            'calls': 0, 'errors': 0, 'retries': 0, 'last_latency_ms': None, 'total_latency_ms': 0.0,
+        })
+        metrics['calls'] += 1
+        metrics['retries'] += retries
+        metrics['last_latency_ms'] = round(latency_ms)
+        metrics['total_latency_ms'] += latency_ms
+        if status is None or status >= 400:
+            metrics['errors'] += 1
+
+
+def get_metrics():
+    """Per-provider call counts and latencies of this worker"""
+    with _metrics_lock:
+        return {
+            provider: dict(metrics, avg_latency_ms=round(metrics['total_latency_ms'] / metrics['calls']))
+            for provider, metrics in _metrics.items() if metrics['calls']
+        }
+
+
+def post_json(provider, url, payload, headers=None, read_timeout=DEFAULT_READ_TIMEOUT, stream=False):
+    """
+    POST ``payload`` as JSON through the pooled session.
+
+    :return: the last ``requests.Response``; statuses that are not retried are returned as is
+    :raise requests.RequestException: when every attempt failed to connect or timed out
+    """
+    session = get_session()
+    start = time.monotonic()
+    response = None
+    attempt = 0
+    try:
+        while True:
+            try:
+                response = session.post(url, json=payload, headers=headers, stream=stream,
+                                        timeout=(CONNECT_TIMEOUT, read_timeout))
+                if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                    return response
+                _logger.info("%s answered HTTP %s, retrying", provider, response.status_code)
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= MAX_RETRIES:
+                    response = None
+                    raise
+                _logger.info("%s request failed (%s), retrying", provider, e)
+            time.sleep(_backoff(attempt, response))
+            attempt += 1
+    finally:
+        latency_ms = (time.monotonic() - start) * 1000
+        _record(provider, latency_ms, response.status_code if response is not None else None, attempt)
+        _logger.debug("%s call took %.0f ms (%s retries)", provider, latency_ms, attempt)
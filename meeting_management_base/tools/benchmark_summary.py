@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the AI summary pipeline against the local mock provider.
+
+Run it from a shell session on a database having the module installed, ``env`` being
+the shell environment::
+
+    from smartdz.addons.meeting_management_base.tools import benchmark_summary
+    benchmark_summary.run(env, meetings=50, concurrency=8, latency_ms=800, error_rate=0.02)
+
+Each meeting goes through the same steps as a dw.meeting.summary.job: the context is
+prepared, fitted to the token budget and planned on the cursor, then the plan runs in a
+pool of ``concurrency`` threads. Nothing is written to the database and no network call
+is made; the mock provider shares the circuit breaker of the real ones, so a high error
+rate opens it like an outage would.
+"""
+import logging
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+WORDS = ('budget', 'planning', 'review', 'staffing', 'delivery', 'risk', 'client', 'contract', 'schedule',
+         'milestone', 'quality', 'training', 'supplier', 'invoice', 'report', 'meeting', 'decision', 'team')
+
+
+def _synthetic_meeting_data(index, note_tokens, participants=5):
+    """Meeting data shaped like generate_summary_data, with about ``note_tokens`` tokens of notes"""
+    rng = random.Random(index)
+    names = [f"Participant {i}" for i in range(1, participants + 1)]
+    paragraph_tokens = 60
+    notes = []
+    for position, name in enumerate(names):
+        paragraphs = [
+            # numbered words keep the paragraphs distinct, the budget would drop them as duplicates
+            ' '.join(f"{rng.choice(WORDS)}{rng.randint(1, 999)}" for _i in range(paragraph_tokens // 2)).capitalize() + '.'
+            for _p in range(max(note_tokens // (participants * paragraph_tokens), 1))
+        ]
+        notes.append({'participant': name, 'notes': '\n\n'.join(paragraphs), 'is_pv': position == 0})
+    return {
+        'meeting': {
+            'name': f"Benchmark meeting {index}",
+            'objet': 'Load test',
+            'start_time': '2025-01-01 09:00',
+            'end_time': '2025-01-01 10:00',
+            'duration': 1.0,
+            'agenda': '1. Review\n2. Planning',
+            'participants': names,
+        },
+        'notes': notes,
+        'actions': [{'title': f"Action {i}", 'assignee': rng.choice(names), 'due_date': '2025-01-15',
+                     'priority': 'medium', 'status': 'todo', 'description': ''} for i in range(5)],
+        'decisions': [{'title': f"Decision {i}", 'description': '', 'decided_by': names[0]} for i in range(3)],
+    }
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of ``values``"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def run(env, meetings=20, concurrency=4, note_tokens=2000, latency_ms=None, jitter_ms=None, error_rate=None,
+        meeting_ids=None):
+    """
+    Summarise ``meetings`` meetings at once with ``concurrency`` workers and report the latencies.
+
+    :param note_tokens: size of the notes of each synthetic meeting; the map-reduce pipeline
+        kicks in above MAP_REDUCE_THRESHOLD_TOKENS
+    :param latency_ms, jitter_ms, error_rate: override the mock settings for this run only
+    :param meeting_ids: summarise these dw.meeting records instead of synthetic meetings
+    :return: dict of the measures, also logged
+    """
+    AI = env['dw.meeting.summary.ai']
+    _provider, config = AI._get_ai_config('mock')
+    for key, value in (('latency_ms', latency_ms), ('jitter_ms', jitter_ms), ('error_rate', error_rate)):
+        if value is not None:
+            config[key] = value
+    chain = [('mock', config)]
+    budget = AI._get_token_budget(chain)
+
+    if meeting_ids:
+        datas = [env['dw.meeting.summary'].generate_summary_data(meeting_id) for meeting_id in meeting_ids]
+    else:
+        datas = [_synthetic_meeting_data(index, note_tokens) for index in range(meetings)]
+
+    prepare_start = time.monotonic()
+    plans = [AI._plan_summary(data, budget) for data in datas]
+    prepare_ms = (time.monotonic() - prepare_start) * 1000
+
+    def execute(plan):
+        start = time.monotonic()
+        result = AI._execute_plan(chain, plan)
+        end = time.monotonic()
+        return start, end, result.get('success')
+
+    # same bound on the provider calls as the job cron running ``concurrency`` workers
+    AI._set_call_limit(concurrency)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='dw_summary_bench') as executor:
+        outcomes = list(executor.map(execute, plans))
+    wall = time.monotonic() - start
+
+    service = [(end - begin) * 1000 for begin, end, _success in outcomes]
+    # time from the submission of the whole batch, queueing in the pool included
+    end_to_end = [(end - start) * 1000 for _begin, end, _success in outcomes]
+    report = {
+        'meetings': len(plans),
+        'concurrency': concurrency,
+        'map_reduce': sum(1 for plan in plans if plan['mode'] == 'map_reduce'),
+        'failed': sum(1 for _begin, _end, success in outcomes if not success),
+        'prepare_ms': round(prepare_ms),
+        'wall_s': round(wall, 3),
+        'throughput_per_s': round(len(plans) / wall, 2) if wall else 0.0,
+    }
+    for name, values in (('service', service), ('end_to_end', end_to_end)):
+        for percent in (50, 95, 99):
+            report[f'{name}_p{percent}_ms'] = round(_percentile(values, percent))
+    _logger.info("Summary benchmark: %s", report)
+    return report